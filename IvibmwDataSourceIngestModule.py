@@ -26,23 +26,60 @@
 
 
 import jarray
-import inspect
+import sys
 import os
+import codecs
+import time
+import calendar
+import heapq
+import hashlib
+import math
+import threading
+import Queue
+import csv
+import struct
+import re
 from java.lang import Class
 from java.lang import System
-from java.sql  import DriverManager, SQLException
+from java.lang import String
+from java.sql  import DriverManager, SQLException, Types
+from org.sqlite import SQLiteConfig
 from java.util.logging import Level
 from java.util import ArrayList
 from java.io import File
+from java.io import IOException
+from java.io import FileOutputStream
+from java.io import RandomAccessFile
+from java.nio.channels import FileChannel
+from java.util.concurrent import Callable
+from java.util.concurrent import Executors
+from java.security import MessageDigest
+from java.awt import BorderLayout
+from java.awt import GridBagLayout
+from java.awt import GridBagConstraints
+from java.awt import Insets
+from javax.swing import JCheckBox
+from javax.swing import JLabel
+from javax.swing import JPanel
+from javax.swing import JScrollPane
+from javax.swing import JTextField
 from org.sleuthkit.datamodel import SleuthkitCase
 from org.sleuthkit.datamodel import AbstractFile
 from org.sleuthkit.datamodel import ReadContentInputStream
 from org.sleuthkit.datamodel import BlackboardArtifact
 from org.sleuthkit.datamodel import BlackboardAttribute
+from org.sleuthkit.datamodel import TskCoreException
+from org.sleuthkit.datamodel import TskData
+from org.sleuthkit.datamodel.Blackboard import BlackboardException
+from org.sleuthkit.datamodel.blackboardutils import GeoArtifactsHelper
+from org.sleuthkit.datamodel.blackboardutils.attributes import GeoTrackPoints
 from org.sleuthkit.autopsy.ingest import IngestModule
 from org.sleuthkit.autopsy.ingest.IngestModule import IngestModuleException
 from org.sleuthkit.autopsy.ingest import DataSourceIngestModule
+from org.sleuthkit.autopsy.ingest import FileIngestModule
 from org.sleuthkit.autopsy.ingest import IngestModuleFactoryAdapter
+from org.sleuthkit.autopsy.ingest import IngestModuleIngestJobSettings
+from org.sleuthkit.autopsy.ingest import IngestModuleIngestJobSettingsPanel
 from org.sleuthkit.autopsy.ingest import IngestMessage
 from org.sleuthkit.autopsy.ingest import IngestServices
 from org.sleuthkit.autopsy.ingest import ModuleDataEvent
@@ -52,6 +89,8 @@ from org.sleuthkit.autopsy.datamodel import ContentUtils
 from org.sleuthkit.autopsy.casemodule.services import Services
 from org.sleuthkit.autopsy.casemodule.services import FileManager
 from org.sleuthkit.autopsy.casemodule.services import Blackboard
+from org.sleuthkit.autopsy.report import GeneralReportModuleAdapter
+from org.sleuthkit.autopsy.report.ReportProgressPanel import ReportStatus
 
 
 # Factory that defines the name and details of the module and allows Autopsy
@@ -72,1163 +111,4089 @@ class IviBmwDbIngestModuleFactory(IngestModuleFactoryAdapter):
     def getModuleVersionNumber(self):
         return "1.0"
 
+    def getDefaultIngestJobSettings(self):
+        return IviBmwDbIngestModuleSettings()
+
+    def hasIngestJobSettingsPanel(self):
+        return True
+
+    def getIngestJobSettingsPanel(self, settings):
+        if not isinstance(settings, IviBmwDbIngestModuleSettings):
+            settings = IviBmwDbIngestModuleSettings()
+        return IviBmwDbIngestModuleSettingsPanel(settings)
+
     def isDataSourceIngestModuleFactory(self):
         return True
 
     def createDataSourceIngestModule(self, ingestOptions):
-        # TODO: Change the class name to the name you'll make below
-        return IviBmwDbIngestModule()
+        if not isinstance(ingestOptions, IviBmwDbIngestModuleSettings):
+            ingestOptions = IviBmwDbIngestModuleSettings()
+        return IviBmwDbIngestModule(ingestOptions)
 
+    # Only one of the two modules extracts, depending on the job settings
+    def isFileIngestModuleFactory(self):
+        return True
 
-# Data Source-level ingest module.  One gets created per data source.
-# TODO: Rename this to something more specific. Could just remove "Factory" from above name.
-class IviBmwDbIngestModule(DataSourceIngestModule):
+    def createFileIngestModule(self, ingestOptions):
+        if not isinstance(ingestOptions, IviBmwDbIngestModuleSettings):
+            ingestOptions = IviBmwDbIngestModuleSettings()
+        return IviBmwDbFileIngestModule(ingestOptions)
 
-    _logger = Logger.getLogger(IviBmwDbIngestModuleFactory.moduleName)
 
-    def log(self, level, msg):
-        self._logger.logp(level, self.__class__.__name__, inspect.stack()[1][3], msg)
+# Ingest job settings: which extractors run, how many rows each one may post
+# per database and how many rows the reader hands over to the writer at a time.
+class IviBmwDbIngestModuleSettings(IngestModuleIngestJobSettings):
+    serialVersionUID = 1
 
     def __init__(self):
-        self.context = None
+        # extractor name -> False when the examiner turned it off
+        self.enabledExtractors = {}
+        # extractor name -> maximum rows per database, 0 for all rows
+        self.rowLimits = {}
+        # extractor name -> run order set by the examiner, lowest first
+        self.priorities = {}
+        self.batchSize = 100
+        self.mediaDetail = False
+        self.previewMode = False
+        self.previewRows = 20
+        self.exportDatabase = True
+        self.discoveryMode = False
+        self.trackReduction = 10
+        self.fileIngestMode = False
+        self.learnKnownDbs = False
+        # Seconds each extractor may run per data source, 0 for no limit
+        self.timeBudget = 1800
+        # Export of an earlier image of the vehicle, "" for a full ingest
+        self.priorExport = ""
+        # First and last day (YYYY-MM-DD, UTC) of the rows read, "" for no bound
+        self.windowStart = ""
+        self.windowEnd = ""
+        # Watchlist file (kind,value[,list name] rows), "" for no watchlist
+        self.watchlist = ""
 
-    # Where any setup and configuration is done
-    # 'context' is an instance of org.sleuthkit.autopsy.ingest.IngestJobContext.
-    # See: http://sleuthkit.org/autopsy/docs/api-docs/4.4/classorg_1_1sleuthkit_1_1autopsy_1_1ingest_1_1_ingest_job_context.html
-    # TODO: Add any setup code that you need here.
-    def startUp(self, context):
-        
-        # Throw an IngestModule.IngestModuleException exception if there was a problem setting up
-        # raise IngestModuleException("Oh No!")
-        self.context = context
+    def getVersionNumber(self):
+        return self.serialVersionUID
 
-    # Where the analysis is done.
-    # The 'dataSource' object being passed in is of type org.sleuthkit.datamodel.Content.
-    # See: http://www.sleuthkit.org/sleuthkit/docs/jni-docs/4.4/interfaceorg_1_1sleuthkit_1_1datamodel_1_1_content.html
-    # 'progressBar' is of type org.sleuthkit.autopsy.ingest.DataSourceIngestModuleProgress
-    # See: http://sleuthkit.org/autopsy/docs/api-docs/4.4/classorg_1_1sleuthkit_1_1autopsy_1_1ingest_1_1_data_source_ingest_module_progress.html
-    # TODO: Add your analysis code in here.
-    def process(self, dataSource, progressBar):
+    def isExtractorEnabled(self, name):
+        return self.enabledExtractors.get(name, True)
 
-        # we don't know how much work there is yet
-        progressBar.switchToIndeterminate()
+    def setExtractorEnabled(self, name, enabled):
+        self.enabledExtractors[name] = enabled
 
-        # Use blackboard class to index blackboard artifacts for keyword search
-        blackboard = Case.getCurrentCase().getServices().getBlackboard()
+    def getRowLimit(self, name):
+        return self.rowLimits.get(name, 0)
 
-        # Find files named contacts.db, regardless of parent path
-        fileManager = Case.getCurrentCase().getServices().getFileManager()
-        files = fileManager.findFiles(dataSource, "contactbook_%.db")
+    def setRowLimit(self, name, limit):
+        self.rowLimits[name] = max(0, limit)
 
-        numFiles = len(files)
-        progressBar.switchToDeterminate(numFiles)
-        fileCount = 0
-        for file in files:
+    def getPriority(self, name, default):
+        return self.priorities.get(name, default)
 
-            # Check if the user pressed cancel while we were busy
-            if self.context.isJobCancelled():
-                return IngestModule.ProcessResult.OK
+    def setPriority(self, name, priority):
+        self.priorities[name] = priority
 
-            self.log(Level.INFO, "Processing file: " + file.getName())
-            fileCount += 1
+    def getBatchSize(self):
+        return self.batchSize
 
-            # Save the DB locally in the temp folder. use file id as name to reduce collisions
-            lclDbPath = os.path.join(Case.getCurrentCase().getTempDirectory(), str(file.getId()) + ".db")
-            ContentUtils.writeToFile(file, File(lclDbPath))
-                        
-            # Open the DB using JDBC
-            try: 
-                Class.forName("org.sqlite.JDBC").newInstance()
-                dbConn = DriverManager.getConnection("jdbc:sqlite:%s"  % lclDbPath)
-            except SQLException as e:
-                self.log(Level.INFO, "Could not open database file (not SQLite) " + file.getName() + " (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
-            
-            # Query the contacts table in the database and get all columns. 
-            try:
-                stmt = dbConn.createStatement()
-                resultSet = stmt.executeQuery("SELECT contact_card_phone.Contact_ID, "
-                                    "contact_card_phone.GivenName, contact_card_phone.FamilyName, "
-                                    "contact_card_phone.Url, contact_card_phone.organisation FROM contact_card_phone "
-                                    "ORDER BY contact_card_phone.GivenName")
-								  
-            except SQLException as e:
-                self.log(Level.INFO, "Error querying database for contacts table (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
+    def setBatchSize(self, batchSize):
+        self.batchSize = max(1, batchSize)
 
-            # Cycle through each row and create artifacts
-            while resultSet.next():
-                try: 
-                    Contact_ID = resultSet.getString("Contact_ID")
-                    GivenName = resultSet.getString("GivenName")
-                    FamilyName = resultSet.getString("FamilyName")
-                    Url = resultSet.getString("Url")
-                    organisation = resultSet.getString("organisation")
-                    
-                    
-                except SQLException as e:
-                    self.log(Level.INFO, "Error getting values from contacts table (" + e.getMessage() + ")")
-                
-                
-                # Make an artifact on the blackboard, TSK_CONTACT and give it attributes for each of the fields
-                art = file.newArtifact(BlackboardArtifact.ARTIFACT_TYPE.TSK_CONTACT)
-                family_name_att_type = blackboard.getOrAddAttributeType('BMW_FAMILY_NAME_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "FamilyName")
-                attributes = ArrayList()
-                
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_USER_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, Contact_ID))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, GivenName))
-                attributes.add(BlackboardAttribute(family_name_att_type,IviBmwDbIngestModuleFactory.moduleName, FamilyName))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_URL.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, Url))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_ORGANIZATION.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, organisation))
-                           
-                art.addAttributes(attributes)
-                try:
-                    # index the artifact for keyword search
-                    blackboard.indexArtifact(art)
-                except Blackboard.BlackboardException as e:
-                    self.log(Level.SEVERE, "Error indexing artifact " + art.getDisplayName())     
-
-        #contact phone
-        arttttId = blackboard.getOrAddArtifactType("TSK_CONTACT_PHONE", "Contact Phone")
-        numFiles = len(files)
-        progressBar.switchToDeterminate(numFiles)
-        fileCount = 0
-        for file in files:
+    def getMediaDetail(self):
+        return self.mediaDetail
 
-            # Check if the user pressed cancel while we were busy
-            if self.context.isJobCancelled():
-                return IngestModule.ProcessResult.OK
+    def setMediaDetail(self, mediaDetail):
+        self.mediaDetail = mediaDetail
 
-            self.log(Level.INFO, "Processing file: " + file.getName())
-            fileCount += 1
+    def getPreviewMode(self):
+        return self.previewMode
 
-            # Save the DB locally in the temp folder. use file id as name to reduce collisions
-            lclDbPath = os.path.join(Case.getCurrentCase().getTempDirectory(), str(file.getId()) + ".db")
-            ContentUtils.writeToFile(file, File(lclDbPath))
-                        
-            # Open the DB using JDBC
-            try: 
-                Class.forName("org.sqlite.JDBC").newInstance()
-                dbConn = DriverManager.getConnection("jdbc:sqlite:%s"  % lclDbPath)
-            except SQLException as e:
-                self.log(Level.INFO, "Could not open database file (not SQLite) " + file.getName() + " (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
-            
-            # Query the contacts table in the database and get all columns. 
-            try:
-                stmt = dbConn.createStatement()
-                resultSet = stmt.executeQuery("SELECT contact_card_phone.Contact_ID, contact_card_phone.GivenName, "
-								  "contact_card_phone.FamilyName, contact_card_phone.AdditionalName, "
-								  "contact_card_phone.Url, contact_card_phone.organisation, "
-								  "phone_data_phone.PhoneNumber FROM contact_card_phone "
-								  "JOIN phone_data_phone ON contact_card_phone.Contact_ID = phone_data_phone.Contact_ID "
-                                  "ORDER BY contact_card_phone.GivenName")
-            except SQLException as e:
-                self.log(Level.INFO, "Error querying database for contacts table (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
+    def setPreviewMode(self, previewMode):
+        self.previewMode = previewMode
 
-            # Cycle through each row and create artifacts
-            while resultSet.next():
-                try: 
-                    Contact_ID = resultSet.getString("Contact_ID")
-                    GivenName = resultSet.getString("GivenName")
-                    FamilyName = resultSet.getString("FamilyName")
-                    PhoneNumber = resultSet.getString("PhoneNumber")
+    def getPreviewRows(self):
+        return self.previewRows
 
-                    
-                except SQLException as e:
-                    self.log(Level.INFO, "Error getting values from contacts table (" + e.getMessage() + ")")
-                
-                
-                # Make an artifact on the blackboard, TSK_CONTACT and give it attributes for each of the fields
-                art = file.newArtifact(arttttId.getTypeID())
-                family_name_att_type = blackboard.getOrAddAttributeType('BMW_FAMILY_NAME_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "FamilyName")
-                attributes = ArrayList()
-                
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_USER_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, Contact_ID))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, GivenName))
-                attributes.add(BlackboardAttribute(family_name_att_type,IviBmwDbIngestModuleFactory.moduleName, FamilyName)) 
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_PHONE_NUMBER.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, PhoneNumber))
-
-                           
-                art.addAttributes(attributes)
-                try:
-                    # index the artifact for keyword search
-                    blackboard.indexArtifact(art)
-                except Blackboard.BlackboardException as e:
-                    self.log(Level.SEVERE, "Error indexing artifact " + art.getDisplayName())
-
-        #contact email
-        arttttIId = blackboard.getOrAddArtifactType("TSK_CONTACT_EMAIL", "Contact Email")
-        numFiles = len(files)
-        progressBar.switchToDeterminate(numFiles)
-        fileCount = 0
-        for file in files:
+    def setPreviewRows(self, previewRows):
+        self.previewRows = max(1, previewRows)
 
-            # Check if the user pressed cancel while we were busy
-            if self.context.isJobCancelled():
-                return IngestModule.ProcessResult.OK
+    def getExportDatabase(self):
+        return self.exportDatabase
 
-            self.log(Level.INFO, "Processing file: " + file.getName())
-            fileCount += 1
+    def setExportDatabase(self, exportDatabase):
+        self.exportDatabase = exportDatabase
 
-            # Save the DB locally in the temp folder. use file id as name to reduce collisions
-            lclDbPath = os.path.join(Case.getCurrentCase().getTempDirectory(), str(file.getId()) + ".db")
-            ContentUtils.writeToFile(file, File(lclDbPath))
-                        
-            # Open the DB using JDBC
-            try: 
-                Class.forName("org.sqlite.JDBC").newInstance()
-                dbConn = DriverManager.getConnection("jdbc:sqlite:%s"  % lclDbPath)
-            except SQLException as e:
-                self.log(Level.INFO, "Could not open database file (not SQLite) " + file.getName() + " (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
-            
-            # Query the contacts table in the database and get all columns. 
-            try:
-                stmt = dbConn.createStatement()
-                resultSet = stmt.executeQuery("SELECT contact_card_phone.Contact_ID, contact_card_phone.GivenName, "
-								  "contact_card_phone.FamilyName, msg_data_phone.EmailAddr FROM contact_card_phone "								  
-					              "JOIN msg_data_phone ON contact_card_phone.Contact_ID = msg_data_phone.Contact_ID "								  
-								  "ORDER BY contact_card_phone.GivenName")
-            except SQLException as e:
-                self.log(Level.INFO, "Error querying database for contacts table (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
+    def getDiscoveryMode(self):
+        return self.discoveryMode
 
-            # Cycle through each row and create artifacts
-            while resultSet.next():
-                try: 
-                    Contact_ID = resultSet.getString("Contact_ID")
-                    GivenName = resultSet.getString("GivenName")
-                    FamilyName = resultSet.getString("FamilyName")
-                    EmailAddr = resultSet.getString("EmailAddr")
-                    
-                    
-                except SQLException as e:
-                    self.log(Level.INFO, "Error getting values from contacts table (" + e.getMessage() + ")")
-                
-                
-                # Make an artifact on the blackboard, TSK_CONTACT and give it attributes for each of the fields
-                art = file.newArtifact(arttttIId.getTypeID())
-                family_name_att_type = blackboard.getOrAddAttributeType('BMW_FAMILY_NAME_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "FamilyName")
-                attributes = ArrayList()
-                
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_USER_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, Contact_ID))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, GivenName))
-                attributes.add(BlackboardAttribute(family_name_att_type,IviBmwDbIngestModuleFactory.moduleName, FamilyName))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_EMAIL.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, EmailAddr))
-               
-
-                
-                           
-                art.addAttributes(attributes)
-                try:
-                    # index the artifact for keyword search
-                    blackboard.indexArtifact(art)
-                except Blackboard.BlackboardException as e:
-                    self.log(Level.SEVERE, "Error indexing artifact " + art.getDisplayName())
-                
-        #contact address
-        arttttIIId = blackboard.getOrAddArtifactType("TSK_CONTACT_ADDRESS", "Contact Address")
-        numFiles = len(files)
-        progressBar.switchToDeterminate(numFiles)
-        fileCount = 0
-        for file in files:
+    def setDiscoveryMode(self, discoveryMode):
+        self.discoveryMode = discoveryMode
 
-            # Check if the user pressed cancel while we were busy
-            if self.context.isJobCancelled():
-                return IngestModule.ProcessResult.OK
+    def getTrackReduction(self):
+        return self.trackReduction
 
-            self.log(Level.INFO, "Processing file: " + file.getName())
-            fileCount += 1
+    def setTrackReduction(self, trackReduction):
+        self.trackReduction = max(1, trackReduction)
 
-            # Save the DB locally in the temp folder. use file id as name to reduce collisions
-            lclDbPath = os.path.join(Case.getCurrentCase().getTempDirectory(), str(file.getId()) + ".db")
-            ContentUtils.writeToFile(file, File(lclDbPath))
-                        
-            # Open the DB using JDBC
-            try: 
-                Class.forName("org.sqlite.JDBC").newInstance()
-                dbConn = DriverManager.getConnection("jdbc:sqlite:%s"  % lclDbPath)
-            except SQLException as e:
-                self.log(Level.INFO, "Could not open database file (not SQLite) " + file.getName() + " (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
-            
-            # Query the contacts table in the database and get all columns. 
-            try:
-                stmt = dbConn.createStatement()
-                resultSet = stmt.executeQuery("SELECT contact_card_phone.Contact_ID, contact_card_phone.GivenName, "
-								  "contact_card_phone.FamilyName, contact_card_phone.AdditionalName, "
-								  "contact_card_phone.Url, contact_card_phone.organisation, "			
-								  "address_phone.StreetHousenumber, address_phone.City, "
-								  "address_phone.Country, address_phone.Postalcode FROM contact_card_phone "
-								  "JOIN address_phone ON contact_card_phone.Contact_ID = address_phone.Contact_ID "
-                                  "WHERE address_phone.crosssum > 0 "
-								  "ORDER BY contact_card_phone.GivenName")
-            except SQLException as e:
-                self.log(Level.INFO, "Error querying database for contacts table (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
+    def getFileIngestMode(self):
+        return self.fileIngestMode
 
-            # Cycle through each row and create artifacts
-            while resultSet.next():
-                try: 
-                    Contact_ID = resultSet.getString("Contact_ID")
-                    GivenName = resultSet.getString("GivenName")
-                    FamilyName = resultSet.getString("FamilyName")
-                    StreetHousenumber = resultSet.getString("StreetHousenumber")
-                    City = resultSet.getString("City")
-                    Country = resultSet.getString("Country")
-                    Postalcode = resultSet.getString("Postalcode")
-                    
-                except SQLException as e:
-                    self.log(Level.INFO, "Error getting values from contacts table (" + e.getMessage() + ")")
-                
-                
-                # Make an artifact on the blackboard, TSK_CONTACT and give it attributes for each of the fields
-                art = file.newArtifact(arttttIIId.getTypeID())
-                postal_code_att_type = blackboard.getOrAddAttributeType('BMW_POSTAL_CODE_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "PostalCode")
-                family_name_att_type = blackboard.getOrAddAttributeType('BMW_FAMILY_NAME_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "FamilyName")
-
-                attributes = ArrayList()
-                
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_USER_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, Contact_ID))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, GivenName))
-                attributes.add(BlackboardAttribute(family_name_att_type,IviBmwDbIngestModuleFactory.moduleName, FamilyName)) 
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_LOCATION.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, StreetHousenumber))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_CITY.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, City))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_COUNTRY.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, Country))
-                attributes.add(BlackboardAttribute(postal_code_att_type,IviBmwDbIngestModuleFactory.moduleName, Postalcode))                 
-                           
-                art.addAttributes(attributes)
-                try:
-                    # index the artifact for keyword search
-                    blackboard.indexArtifact(art)
-                except Blackboard.BlackboardException as e:
-                    self.log(Level.SEVERE, "Error indexing artifact " + art.getDisplayName())
-                
-        #bluetooth
-        arttId = blackboard.getOrAddArtifactType("TSK_BLUETOOTH_ADDRESS", "Bluetooth Address")
-
-        numFiles = len(files)
-        progressBar.switchToDeterminate(numFiles)
-        fileCount = 0
-        for file in files:
+    def setFileIngestMode(self, fileIngestMode):
+        self.fileIngestMode = fileIngestMode
 
-            # Check if the user pressed cancel while we were busy
-            if self.context.isJobCancelled():
-                return IngestModule.ProcessResult.OK
+    def getTimeBudget(self):
+        return self.timeBudget
 
-            self.log(Level.INFO, "Processing file: " + file.getName())
-            fileCount += 1
+    def setTimeBudget(self, timeBudget):
+        self.timeBudget = max(0, timeBudget)
 
-            # Save the DB locally in the temp folder. use file id as name to reduce collisions
-            lclDbPath = os.path.join(Case.getCurrentCase().getTempDirectory(), str(file.getId()) + ".db")
-            ContentUtils.writeToFile(file, File(lclDbPath))
-                        
-            # Open the DB using JDBC
-            try: 
-                Class.forName("org.sqlite.JDBC").newInstance()
-                dbConn = DriverManager.getConnection("jdbc:sqlite:%s"  % lclDbPath)
-            except SQLException as e:
-                self.log(Level.INFO, "Could not open database file (not SQLite) " + file.getName() + " (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
-            
-            # Query the bluetooth table in the database and get all columns. 
-            try:
-                stmt = dbConn.createStatement()
-                resultSet = stmt.executeQuery("SELECT Origin, BtAddress FROM bluetooth")
-            except SQLException as e:
-                self.log(Level.INFO, "Error querying database for contacts table (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
+    def getPriorExport(self):
+        return self.priorExport
 
-            # Cycle through each row and create artifacts
-            while resultSet.next():
-                try: 
-                    Origin = resultSet.getString("Origin")
-                    BtAddress = resultSet.getString("BtAddress")
-                   
-                    
-                except SQLException as e:
-                    self.log(Level.INFO, "Error getting values from contacts table (" + e.getMessage() + ")")
-                
-                
-                # Make an artifact on the blackboard, TSK_BLUETOOTH_PAIRING and give it attributes for each of the fields
-                art = file.newArtifact(arttId.getTypeID())
-                
-                bluetooth_address_att_type = blackboard.getOrAddAttributeType('BMW_BLUETOOTH_ADDRESS_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "BtAddress")
-                
-                attributes = ArrayList()
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, Origin))
-                attributes.add(BlackboardAttribute(bluetooth_address_att_type,IviBmwDbIngestModuleFactory.moduleName, BtAddress)) 
-                                         
-                art.addAttributes(attributes)
-                try:
-                    # index the artifact for keyword search
-                    blackboard.indexArtifact(art)
-                except Blackboard.BlackboardException as e:
-                    self.log(Level.SEVERE, "Error indexing artifact " + art.getDisplayName())
-        
-        #callstacks
-        files = fileManager.findFiles(dataSource, "pm800%.a")
+    def setPriorExport(self, priorExport):
+        self.priorExport = priorExport.strip()
 
-        numFiles = len(files)
-        progressBar.switchToDeterminate(numFiles)
-        fileCount = 0
-        for file in files:
+    def getWatchlist(self):
+        return self.watchlist
 
-            # Check if the user pressed cancel while we were busy
-            if self.context.isJobCancelled():
-                return IngestModule.ProcessResult.OK
+    def setWatchlist(self, watchlist):
+        self.watchlist = watchlist.strip()
 
-            self.log(Level.INFO, "Processing file: " + file.getName())
-            fileCount += 1
-
-            # Save the DB locally in the temp folder. use file id as name to reduce collisions
-            lclDbPath = os.path.join(Case.getCurrentCase().getTempDirectory(), str(file.getId()) + ".db" )
-            ContentUtils.writeToFile(file, File(lclDbPath))
-                        
-            # Open the DB using JDBC
-            try: 
-                Class.forName("org.sqlite.JDBC").newInstance()
-                dbConn = DriverManager.getConnection("jdbc:sqlite:%s"  % lclDbPath)
-            except SQLException as e:
-                self.log(Level.INFO, "Could not open database file (not SQLite) " + file.getName() + " (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
-            
-            # Query the callstacks table in the database and get all columns. 
-            try:
-                stmt = dbConn.createStatement()
-                resultSet = stmt.executeQuery("SELECT CALLSTACKS.ID, CALLSTACKS.FN, CALLSTACKS.TEL_NR, STRFTIME('%s', CALLSTACKS.TIMESTAMP) AS TIMESTAMP FROM CALLSTACKS")
-            except SQLException as e:
-                self.log(Level.INFO, "Error querying database for contacts table (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
+    def getWindowStart(self):
+        return self.windowStart
 
-            # Cycle through each row and create artifacts
-            while resultSet.next():
-                try: 
-                    ID = resultSet.getString("ID")
-                    if resultSet.getString("FN") == None:
-                        FN = ""
-                    else:
-                        FN = resultSet.getString("FN")
-                    TEL_NR = resultSet.getString("TEL_NR")
-                    TIMESTAMP = resultSet.getInt("TIMESTAMP")
-                    
-                    
-                except SQLException as e:
-                    self.log(Level.INFO, "Error getting values from contacts table (" + e.getMessage() + ")")                
-                
-                # Make an artifact on the blackboard, TSK_CALLLOG and give it attributes for each of the fields
-                art = file.newArtifact(BlackboardArtifact.ARTIFACT_TYPE.TSK_CALLLOG)
-                attributes = ArrayList()
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, ID))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, FN))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_PHONE_NUMBER.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, TEL_NR))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DATETIME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, long(TIMESTAMP)))
-                
-                art.addAttributes(attributes)
-                try:
-                    # index the artifact for keyword search
-                    blackboard.indexArtifact(art)
-                except Blackboard.BlackboardException as e:
-                    self.log(Level.SEVERE, "Error indexing artifact " + art.getDisplayName())
-                
-        #bluetooth pairing, BluetoothAddress, EMEI, IMSI, MODEL TELEPHONE
-        files = fileManager.findFiles(dataSource, "p%.db")
-
-        numFiles = len(files)
-        progressBar.switchToDeterminate(numFiles)
-        fileCount = 0
-        for file in files:
+    def setWindowStart(self, windowStart):
+        self.windowStart = self._checkDay(windowStart, self.windowStart)
 
-            # Check if the user pressed cancel while we were busy
-            if self.context.isJobCancelled():
-                return IngestModule.ProcessResult.OK
+    def getWindowEnd(self):
+        return self.windowEnd
 
-            self.log(Level.INFO, "Processing file: " + file.getName())
-            fileCount += 1
+    def setWindowEnd(self, windowEnd):
+        self.windowEnd = self._checkDay(windowEnd, self.windowEnd)
 
-            # Save the DB locally in the temp folder. use file id as name to reduce collisions
-            lclDbPath = os.path.join(Case.getCurrentCase().getTempDirectory(), str(file.getId()) + ".db")
-            ContentUtils.writeToFile(file, File(lclDbPath))
-                        
-            # Open the DB using JDBC
-            try: 
-                Class.forName("org.sqlite.JDBC").newInstance()
-                dbConn = DriverManager.getConnection("jdbc:sqlite:%s"  % lclDbPath)
-            except SQLException as e:
-                self.log(Level.INFO, "Could not open database file (not SQLite) " + file.getName() + " (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
-            
-            # Query the bluetooth pairing, BluetoothAddress, EMEI, IMSI, MODEL TELEPHONE table in the database and get all columns. 
-            try:
-                stmt = dbConn.createStatement()
-                resultSet = stmt.executeQuery("SELECT SID, INFO_KEY, INFO_VALUE FROM CE_DEVICE_INFO WHERE INFO_KEY = 'IMEI' OR INFO_KEY = 'IMSI' OR INFO_KEY = 'BluetoothAddress' or INFO_KEY = 'Model' ORDER BY SID")
-            except SQLException as e:
-                self.log(Level.INFO, "Error querying database for contacts table (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
+    # Days that do not parse keep their previous value
+    @staticmethod
+    def _checkDay(day, default):
+        day = day.strip()
+        if not day:
+            return ""
+        try:
+            time.strptime(day, "%Y-%m-%d")
+            return day
+        except ValueError:
+            return default
 
-            # Cycle through each row and create artifacts
-            while resultSet.next():
-                try: 
-                    SID = resultSet.getString("SID")
-                    INFO_KEY = resultSet.getString("INFO_KEY")
-                    INFO_VALUE = resultSet.getString("INFO_VALUE")
-                   
-                    
-                except SQLException as e:
-                    self.log(Level.INFO, "Error getting values from contacts table (" + e.getMessage() + ")")
-                
-                
-                # Make an artifact on the blackboard, TSK_BLUETOOTH_PAIRING and give it attributes for each of the fields
-                art = file.newArtifact(BlackboardArtifact.ARTIFACT_TYPE.TSK_BLUETOOTH_PAIRING)
-                attributes = ArrayList()
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, SID))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DESCRIPTION.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, INFO_KEY))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DEVICE_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, INFO_VALUE))
-                
-                art.addAttributes(attributes)
-                try:
-                    # index the artifact for keyword search
-                    blackboard.indexArtifact(art)
-                except Blackboard.BlackboardException as e:
-                    self.log(Level.SEVERE, "Error indexing artifact " + art.getDisplayName())
-                
-        #BROWSER
-        files = fileManager.findFiles(dataSource, "BrowserUrls.db")
-
-        numFiles = len(files)
-        progressBar.switchToDeterminate(numFiles)
-        fileCount = 0
-        for file in files:
+    # (start, end) in epoch seconds of the time window, the end day included and
+    # None for an open bound
+    def getTimeWindow(self):
+        start = None
+        end = None
+        if self.windowStart:
+            start = calendar.timegm(time.strptime(self.windowStart, "%Y-%m-%d"))
+        if self.windowEnd:
+            end = calendar.timegm(time.strptime(self.windowEnd, "%Y-%m-%d")) + 86400
+        return (start, end)
 
-            # Check if the user pressed cancel while we were busy
-            if self.context.isJobCancelled():
-                return IngestModule.ProcessResult.OK
+    def getLearnKnownDbs(self):
+        return self.learnKnownDbs
 
-            self.log(Level.INFO, "Processing file: " + file.getName())
-            fileCount += 1
+    def setLearnKnownDbs(self, learnKnownDbs):
+        self.learnKnownDbs = learnKnownDbs
 
-            # Save the DB locally in the temp folder. use file id as name to reduce collisions
-            lclDbPath = os.path.join(Case.getCurrentCase().getTempDirectory(), str(file.getId()) + ".db")
-            ContentUtils.writeToFile(file, File(lclDbPath))
-                        
-            # Open the DB using JDBC
-            try: 
-                Class.forName("org.sqlite.JDBC").newInstance()
-                dbConn = DriverManager.getConnection("jdbc:sqlite:%s"  % lclDbPath)
-            except SQLException as e:
-                self.log(Level.INFO, "Could not open database file (not SQLite) " + file.getName() + " (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
-            
-            # Query the BROWSER table in the database and get all columns. 
-            try:
-                stmt = dbConn.createStatement()
-                resultSet = stmt.executeQuery("SELECT urls.id, urls.title, urls.url, visits.datevisit FROM urls LEFT JOIN visits")
-            except SQLException as e:
-                self.log(Level.INFO, "Error querying database for contacts table (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
 
-            # Cycle through each row and create artifacts
-            while resultSet.next():
-                try: 
-                    id = resultSet.getString("id")
-                    title = resultSet.getString("title")
-                    url = resultSet.getString("url")
-                    datevisit = resultSet.getInt("datevisit")
-                    urlid = resultSet.getString("urlid")
-                        
-                    
-                    
-                except SQLException as e:
-                    self.log(Level.INFO, "Error getting values from contacts table (" + e.getMessage() + ")")
-                
-                
-                # Make an artifact on the blackboard, TSK_WEB_HISTORY and give it attributes for each of the fields
-                art = file.newArtifact(BlackboardArtifact.ARTIFACT_TYPE.TSK_WEB_HISTORY)
-                attributes = ArrayList()
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, id))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_TITLE.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, title))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_URL.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, url))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DATETIME_ACCESSED.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, datevisit))
-  
-                art.addAttributes(attributes)
-                try:
-                    # index the artifact for keyword search
-                    blackboard.indexArtifact(art)
-                except Blackboard.BlackboardException as e:
-                    self.log(Level.SEVERE, "Error indexing artifact " + art.getDisplayName())
+# Settings panel shown in the ingest job wizard: one check box, row limit and
+# priority per extractor, the batch size and the media library detail switch.
+class IviBmwDbIngestModuleSettingsPanel(IngestModuleIngestJobSettingsPanel):
 
-        #COOKIES
-        files = fileManager.findFiles(dataSource, "cookie.db")
+    def __init__(self, settings):
+        self.local_settings = settings
+        self.initComponents()
 
-        numFiles = len(files)
-        progressBar.switchToDeterminate(numFiles)
-        fileCount = 0
-        for file in files:
+    def initComponents(self):
+        self.setLayout(BorderLayout())
+        panel = JPanel(GridBagLayout())
+        constraints = GridBagConstraints()
+        constraints.anchor = GridBagConstraints.WEST
+        constraints.insets = Insets(1, 4, 1, 4)
 
-            # Check if the user pressed cancel while we were busy
-            if self.context.isJobCancelled():
-                return IngestModule.ProcessResult.OK
+        constraints.gridy = 0
+        constraints.gridx = 0
+        panel.add(JLabel("Extractor"), constraints)
+        constraints.gridx = 1
+        panel.add(JLabel("Max rows per database (0 = all)"), constraints)
+        constraints.gridx = 2
+        panel.add(JLabel("Priority (lowest first)"), constraints)
 
-            self.log(Level.INFO, "Processing file: " + file.getName())
-            fileCount += 1
+        # extractor name -> (check box, row limit field, priority field)
+        self.extractorFields = {}
+        for extractor in createExtractors():
+            constraints.gridy += 1
+            constraints.gridx = 0
+            checkBox = JCheckBox(extractor.name, self.local_settings.isExtractorEnabled(extractor.name))
+            panel.add(checkBox, constraints)
+            constraints.gridx = 1
+            limitField = JTextField(str(self.local_settings.getRowLimit(extractor.name)), 8)
+            panel.add(limitField, constraints)
+            constraints.gridx = 2
+            priorityField = JTextField(str(self.local_settings.getPriority(extractor.name, extractor.priority)), 4)
+            panel.add(priorityField, constraints)
+            self.extractorFields[extractor.name] = (checkBox, limitField, priorityField)
 
-            # Save the DB locally in the temp folder. use file id as name to reduce collisions
-            lclDbPath = os.path.join(Case.getCurrentCase().getTempDirectory(), str(file.getId()) + ".db")
-            ContentUtils.writeToFile(file, File(lclDbPath))
-                        
-            # Open the DB using JDBC
-            try: 
-                Class.forName("org.sqlite.JDBC").newInstance()
-                dbConn = DriverManager.getConnection("jdbc:sqlite:%s"  % lclDbPath)
-            except SQLException as e:
-                self.log(Level.INFO, "Could not open database file (not SQLite) " + file.getName() + " (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
-            
-            # Query the COOKIES table in the database and get all columns. 
-            try:
-                stmt = dbConn.createStatement()
-                resultSet = stmt.executeQuery("SELECT cookies.name, cookies.host, cookies.path, cookies.lastAccessed FROM cookies")
-            except SQLException as e:
-                self.log(Level.INFO, "Error querying database for contacts table (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
+        constraints.gridy += 1
+        constraints.gridx = 0
+        panel.add(JLabel("Batch size (rows)"), constraints)
+        constraints.gridx = 1
+        self.batchSizeField = JTextField(str(self.local_settings.getBatchSize()), 8)
+        panel.add(self.batchSizeField, constraints)
 
-            # Cycle through each row and create artifacts
-            while resultSet.next():
-                try: 
-                    name = resultSet.getString("name")
-                    host = resultSet.getString("host")
-                    path = resultSet.getString("path")
-                    lastAccessed = resultSet.getInt("lastAccessed")
-                    
-                        
-                    
-                    
-                except SQLException as e:
-                    self.log(Level.INFO, "Error getting values from contacts table (" + e.getMessage() + ")")
-                
-                
-                # Make an artifact on the blackboard, TSK_WEB_COOKIE and give it attributes for each of the fields
-                art = file.newArtifact(BlackboardArtifact.ARTIFACT_TYPE.TSK_WEB_COOKIE)
-                attributes = ArrayList()
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, name))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_URL.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, host))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_PATH.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, path))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DATETIME_ACCESSED.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, lastAccessed))
+        constraints.gridy += 1
+        constraints.gridx = 0
+        panel.add(JLabel("Time budget per extractor (seconds, 0 = none)"), constraints)
+        constraints.gridx = 1
+        self.timeBudgetField = JTextField(str(self.local_settings.getTimeBudget()), 8)
+        panel.add(self.timeBudgetField, constraints)
 
-                art.addAttributes(attributes)
-                try:
-                    # index the artifact for keyword search
-                    blackboard.indexArtifact(art)
-                except Blackboard.BlackboardException as e:
-                    self.log(Level.SEVERE, "Error indexing artifact " + art.getDisplayName())
+        constraints.gridy += 1
+        constraints.gridx = 0
+        panel.add(JLabel("Time window, first and last day (YYYY-MM-DD UTC, empty = open)"), constraints)
+        constraints.gridx = 1
+        self.windowStartField = JTextField(self.local_settings.getWindowStart(), 8)
+        panel.add(self.windowStartField, constraints)
+        constraints.gridx = 2
+        self.windowEndField = JTextField(self.local_settings.getWindowEnd(), 8)
+        panel.add(self.windowEndField, constraints)
 
-        #messages
-        files = fileManager.findFiles(dataSource, "f2%.sqlite")
+        constraints.gridy += 1
+        constraints.gridx = 0
+        constraints.gridwidth = 3
+        self.mediaDetailCheckBox = JCheckBox("One artifact per media library row (albums, artists, music groups)", self.local_settings.getMediaDetail())
+        panel.add(self.mediaDetailCheckBox, constraints)
 
-        numFiles = len(files)
-        progressBar.switchToDeterminate(numFiles)
-        fileCount = 0
-        for file in files:
+        constraints.gridy += 1
+        self.previewModeCheckBox = JCheckBox("Triage preview: count rows and post only the first rows of each source", self.local_settings.getPreviewMode())
+        panel.add(self.previewModeCheckBox, constraints)
 
-            # Check if the user pressed cancel while we were busy
-            if self.context.isJobCancelled():
-                return IngestModule.ProcessResult.OK
+        constraints.gridy += 1
+        constraints.gridwidth = 1
+        panel.add(JLabel("Preview rows per database"), constraints)
+        constraints.gridx = 1
+        self.previewRowsField = JTextField(str(self.local_settings.getPreviewRows()), 8)
+        panel.add(self.previewRowsField, constraints)
 
-            self.log(Level.INFO, "Processing file: " + file.getName())
-            fileCount += 1
-
-            # Save the DB locally in the temp folder. use file id as name to reduce collisions
-            lclDbPath = os.path.join(Case.getCurrentCase().getTempDirectory(), str(file.getId()) + ".db" )
-            ContentUtils.writeToFile(file, File(lclDbPath))
-                        
-            # Open the DB using JDBC
-            try: 
-                Class.forName("org.sqlite.JDBC").newInstance()
-                dbConn = DriverManager.getConnection("jdbc:sqlite:%s"  % lclDbPath)
-            except SQLException as e:
-                self.log(Level.INFO, "Could not open database file (not SQLite) " + file.getName() + " (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
-            
-            # Query the messages table in the database and get all columns. 
-            try:
-                stmt = dbConn.createStatement()
-                resultSet = stmt.executeQuery('SELECT messages.id, messages.fromPhoneNumber, strftime("%s", substr(date,1,4) || "-" || substr(date,5,2) || "-" || substr(date,7,2) || "T" || substr(date,9,2) || ":" || substr(date,11,2) || ":" || substr(date,13,2)) as newdate, messages.subject FROM messages')
-            except SQLException as e:
-                self.log(Level.INFO, "Error querying database for contacts table (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
+        constraints.gridy += 1
+        constraints.gridx = 0
+        constraints.gridwidth = 3
+        self.exportDatabaseCheckBox = JCheckBox("Write the extracted data to vehicle_<data source id>.db in the module output folder", self.local_settings.getExportDatabase())
+        panel.add(self.exportDatabaseCheckBox, constraints)
 
-            # Cycle through each row and create artifacts
-            while resultSet.next():
-                try: 
-                    id = resultSet.getString("id")
-                    fromPhoneNumber = resultSet.getString("fromPhoneNumber")
-                    date = resultSet.getLong("newdate")
-                    subject = resultSet.getString("subject")
-                    
-                    art = file.newArtifact(BlackboardArtifact.ARTIFACT_TYPE.TSK_MESSAGE)
-                    
-                    from_number_att_type = blackboard.getOrAddAttributeType('BMW_FROM_NUMBER_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "fromPhoneNumber")
-
-                    attributes = ArrayList()
-                    
-                    attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, id))
-                    attributes.add(BlackboardAttribute(from_number_att_type,IviBmwDbIngestModuleFactory.moduleName, fromPhoneNumber))
-                    attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DATETIME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, date))
-                    attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_TEXT.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, subject))
-                    
-
-                
-                
-                    art.addAttributes(attributes)
-                    try:
-                        Case.getCurrentCase().getSleuthkitCase().getBlackboard().postArtifact(art, IviBmwDbIngestModuleFactory.moduleName)
-                    except Blackboard.BlackboardException as e:
-                        self.log(Level.SEVERE, "Error posting artifact " + art.getDisplayName())
-                    
-                except SQLException as e:
-                    self.log(Level.INFO, "Error getting values from contacts table (" + e.getMessage() + ")")
-                
-       
-        
+        constraints.gridy += 1
+        self.discoveryModeCheckBox = JCheckBox("Discovery: fingerprint every SQLite database of the data source", self.local_settings.getDiscoveryMode())
+        panel.add(self.discoveryModeCheckBox, constraints)
 
-        #mme_mediastores
-        files = fileManager.findFiles(dataSource, "mme%")
+        constraints.gridy += 1
+        constraints.gridwidth = 1
+        panel.add(JLabel("Prior export for a differential ingest (vehicle_<id>.db)"), constraints)
+        constraints.gridx = 1
+        constraints.gridwidth = 2
+        self.priorExportField = JTextField(self.local_settings.getPriorExport(), 30)
+        panel.add(self.priorExportField, constraints)
 
-        numFiles = len(files)
-        progressBar.switchToDeterminate(numFiles)
-        fileCount = 0
-        for file in files:
+        constraints.gridy += 1
+        constraints.gridx = 0
+        constraints.gridwidth = 1
+        panel.add(JLabel("Watchlist file (kind,value[,list name] rows)"), constraints)
+        constraints.gridx = 1
+        constraints.gridwidth = 2
+        self.watchlistField = JTextField(self.local_settings.getWatchlist(), 30)
+        panel.add(self.watchlistField, constraints)
+        constraints.gridx = 0
+        constraints.gridwidth = 3
 
-            # Check if the user pressed cancel while we were busy
-            if self.context.isJobCancelled():
-                return IngestModule.ProcessResult.OK
+        constraints.gridy += 1
+        constraints.gridwidth = 1
+        panel.add(JLabel("GPS track reduction factor"), constraints)
+        constraints.gridx = 1
+        self.trackReductionField = JTextField(str(self.local_settings.getTrackReduction()), 8)
+        panel.add(self.trackReductionField, constraints)
 
-            self.log(Level.INFO, "Processing file: " + file.getName())
-            fileCount += 1
-
-            # Save the DB locally in the temp folder. use file id as name to reduce collisions
-            lclDbPath = os.path.join(Case.getCurrentCase().getTempDirectory(), str(file.getId()) + ".db" )
-            ContentUtils.writeToFile(file, File(lclDbPath))
-                        
-            # Open the DB using JDBC
-            try: 
-                Class.forName("org.sqlite.JDBC").newInstance()
-                dbConn = DriverManager.getConnection("jdbc:sqlite:%s"  % lclDbPath)
-            except SQLException as e:
-                self.log(Level.INFO, "Could not open database file (not SQLite) " + file.getName() + " (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
-            
-            # Query the mme_mediastores table in the database and get all columns. 
-            try:
-                stmt = dbConn.createStatement()
-                resultSet = stmt.executeQuery("SELECT msid, lastseen, mssname, name, identifier, mountpath FROM mediastores")
-            except SQLException as e:
-                self.log(Level.INFO, "Error querying database for contacts table (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
+        constraints.gridy += 1
+        constraints.gridx = 0
+        constraints.gridwidth = 3
+        self.fileIngestModeCheckBox = JCheckBox("Extract on the file ingest threads, alongside the other file modules (no discovery)", self.local_settings.getFileIngestMode())
+        panel.add(self.fileIngestModeCheckBox, constraints)
 
-            # Cycle through each row and create artifacts
-            while resultSet.next():
-                try: 
-                    msid = resultSet.getString("msid") 
-                    lastseen = resultSet.getLong("lastseen")
-                    mssname = resultSet.getString("mssname")
-                    name = resultSet.getString("name")
-                    identifier = resultSet.getString("identifier")
-                    mountpath = resultSet.getString("mountpath")
-                   
-                    
-                except SQLException as e:
-                    self.log(Level.INFO, "Error getting values from contacts table (" + e.getMessage() + ")")                
-                
-                # Make an artifact on the blackboard, TSK_DEVICE_INFO and give it attributes for each of the fields
-                art = file.newArtifact(BlackboardArtifact.ARTIFACT_TYPE.TSK_DEVICE_INFO)
-                attributes = ArrayList()
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, msid))
-                
-                timevalue = lastseen/1000000000
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DATETIME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, timevalue))
-                
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DESCRIPTION.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, mssname))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, name))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DEVICE_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, identifier))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_PATH.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, mountpath))
-               
+        constraints.gridy += 1
+        self.learnKnownDbsCheckBox = JCheckBox("Add the databases of this data source to the known stock databases (reference vehicles only)", self.local_settings.getLearnKnownDbs())
+        panel.add(self.learnKnownDbsCheckBox, constraints)
 
-                art.addAttributes(attributes)
-                try:
-                    # index the artifact for keyword search
-                    blackboard.indexArtifact(art)
-                except Blackboard.BlackboardException as e:
-                    self.log(Level.SEVERE, "Error indexing artifact " + art.getDisplayName())
-                
-        #music and groups        
-        artId = blackboard.getOrAddArtifactType("TSK_MUSIC_GROUPS", "Music Groups")
-
-        numFiles = len(files)
-        progressBar.switchToDeterminate(numFiles)
-        fileCount = 0
-        for file in files:
+        self.add(JScrollPane(panel), BorderLayout.CENTER)
 
-            # Check if the user pressed cancel while we were busy
-            if self.context.isJobCancelled():
-                return IngestModule.ProcessResult.OK
+    # Numbers that do not parse keep their previous value
+    def _parseInt(self, field, default):
+        try:
+            return int(field.getText().strip())
+        except ValueError:
+            return default
 
-            self.log(Level.INFO, "Processing file: " + file.getName())
-            fileCount += 1
-
-            # Save the DB locally in the temp folder. use file id as name to reduce collisions
-            lclDbPath = os.path.join(Case.getCurrentCase().getTempDirectory(), str(file.getId()) + ".db" )
-            ContentUtils.writeToFile(file, File(lclDbPath))
-                        
-            # Open the DB using JDBC
-            try: 
-                Class.forName("org.sqlite.JDBC").newInstance()
-                dbConn = DriverManager.getConnection("jdbc:sqlite:%s"  % lclDbPath)
-            except SQLException as e:
-                self.log(Level.INFO, "Could not open database file (not SQLite) " + file.getName() + " (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
-            
-            # Query the music and groups  table in the database and get all columns. 
-            try:
-                stmt = dbConn.createStatement()
-                resultSet = stmt.executeQuery("SELECT categorydata_custom.name FROM categorydata_custom")
-            except SQLException as e:
-                self.log(Level.INFO, "Error querying database for contacts table (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
+    def getSettings(self):
+        defaultPriorities = dict([(extractor.name, extractor.priority) for extractor in createExtractors()])
+        for name, (checkBox, limitField, priorityField) in self.extractorFields.items():
+            self.local_settings.setExtractorEnabled(name, checkBox.isSelected())
+            self.local_settings.setRowLimit(name, self._parseInt(limitField, self.local_settings.getRowLimit(name)))
+            self.local_settings.setPriority(name, self._parseInt(priorityField, self.local_settings.getPriority(name, defaultPriorities[name])))
+        self.local_settings.setBatchSize(self._parseInt(self.batchSizeField, self.local_settings.getBatchSize()))
+        self.local_settings.setTimeBudget(self._parseInt(self.timeBudgetField, self.local_settings.getTimeBudget()))
+        self.local_settings.setWindowStart(self.windowStartField.getText())
+        self.local_settings.setWindowEnd(self.windowEndField.getText())
+        self.local_settings.setMediaDetail(self.mediaDetailCheckBox.isSelected())
+        self.local_settings.setPreviewMode(self.previewModeCheckBox.isSelected())
+        self.local_settings.setPreviewRows(self._parseInt(self.previewRowsField, self.local_settings.getPreviewRows()))
+        self.local_settings.setExportDatabase(self.exportDatabaseCheckBox.isSelected())
+        self.local_settings.setDiscoveryMode(self.discoveryModeCheckBox.isSelected())
+        self.local_settings.setPriorExport(self.priorExportField.getText())
+        self.local_settings.setWatchlist(self.watchlistField.getText())
+        self.local_settings.setTrackReduction(self._parseInt(self.trackReductionField, self.local_settings.getTrackReduction()))
+        self.local_settings.setFileIngestMode(self.fileIngestModeCheckBox.isSelected())
+        self.local_settings.setLearnKnownDbs(self.learnKnownDbsCheckBox.isSelected())
+        return self.local_settings
 
-            # Cycle through each row and create artifacts
-            while resultSet.next():
-                try: 
-                    name = resultSet.getString("name")
-                    
-                    
-                except SQLException as e:
-                    self.log(Level.INFO, "Error getting values from contacts table (" + e.getMessage() + ")")                
-                
-                # Make an artifact on the blackboard, TSK_DOWNLOAD_SOURCE and give it attributes for each of the fields
-                art = file.newArtifact(artId.getTypeID())
-                attributes = ArrayList()
-                
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, name))
-               
 
+# In-memory index correlating the phone numbers of calls and messages with the
+# phone book. Numbers are reduced to canonical keys so "+351 912 345 678",
+# "00351912345678" and "912345678" land in the same hash bucket, which keeps the
+# correlation a single linear pass instead of comparing every call to every contact.
+class PhoneNumberIndex(object):
 
-                art.addAttributes(attributes)
-                try:
-                    # index the artifact for keyword search
-                    blackboard.indexArtifact(art)
-                except Blackboard.BlackboardException as e:
-                    self.log(Level.SEVERE, "Error indexing artifact " + art.getDisplayName())                
-             
-        #software  
-        artIId = blackboard.getOrAddArtifactType("TSK_SOFTWARE_INFO", "Software info")
-        
-        numFiles = len(files)
-        progressBar.switchToDeterminate(numFiles)
-        fileCount = 0
-        for file in files:
+    # Trailing digits kept in a key, the length of a national subscriber number.
+    # Shorter numbers (service codes) are kept whole.
+    keyDigits = 9
 
-            # Check if the user pressed cancel while we were busy
-            if self.context.isJobCancelled():
-                return IngestModule.ProcessResult.OK
+    def __init__(self):
+        # canonical key -> list of (contact name, contact artifact id)
+        self._contacts = {}
+        # (canonical key, call or message artifact id); ids only, so the
+        # artifacts are not held in memory for the whole job
+        self._references = []
+        # Filled from every file ingest thread in the file ingest variant
+        self._lock = threading.Lock()
 
-            self.log(Level.INFO, "Processing file: " + file.getName())
-            fileCount += 1
-
-            # Save the DB locally in the temp folder. use file id as name to reduce collisions
-            lclDbPath = os.path.join(Case.getCurrentCase().getTempDirectory(), str(file.getId()) + ".db" )
-            ContentUtils.writeToFile(file, File(lclDbPath))
-                        
-            # Open the DB using JDBC
-            try: 
-                Class.forName("org.sqlite.JDBC").newInstance()
-                dbConn = DriverManager.getConnection("jdbc:sqlite:%s"  % lclDbPath)
-            except SQLException as e:
-                self.log(Level.INFO, "Could not open database file (not SQLite) " + file.getName() + " (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
-            
-            # Query the software table in the database and get all columns. 
-            try:
-                stmt = dbConn.createStatement()
-                resultSet = stmt.executeQuery("SELECT software_info.version FROM software_info")
-            except SQLException as e:
-                self.log(Level.INFO, "Error querying database for contacts table (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
+    # Strip punctuation, the international prefix and trunk zeros, then keep
+    # the subscriber part so the country code no longer matters.
+    @staticmethod
+    def normalize(number):
+        if not number:
+            return None
+        digits = "".join([c for c in number if c.isdigit()])
+        digits = digits.lstrip("0")
+        if not digits:
+            return None
+        return digits[-PhoneNumberIndex.keyDigits:]
 
-            # Cycle through each row and create artifacts
-            while resultSet.next():
-                try: 
-                    version = resultSet.getString("version")
-                    
-                    
-                except SQLException as e:
-                    self.log(Level.INFO, "Error getting values from contacts table (" + e.getMessage() + ")")                
-                
-                # Make an artifact on the blackboard, TSK_DOWNLOAD_SOURCE and give it attributes for each of the fields
-                art = file.newArtifact(artIId.getTypeID())
-                attributes = ArrayList()
-                
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_VERSION.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, version))
-               
+    # art is None for a contact unchanged since the prior image of a
+    # differential ingest, which has no new artifact
+    def addContact(self, number, art, name):
+        key = PhoneNumberIndex.normalize(number)
+        if key is not None:
+            with self._lock:
+                self._contacts.setdefault(key, []).append((name, None if art is None else art.getArtifactID()))
 
+    def addReference(self, number, art):
+        key = PhoneNumberIndex.normalize(number)
+        if key is not None:
+            with self._lock:
+                self._references.append((key, art.getArtifactID()))
 
+    # Hash-join every call and message to the contacts sharing its key and enrich
+    # the artifact with the contact name and the id of the contact artifact. The
+    # artifact is indexed again through the module so keyword search sees the name.
+    # Returns the number of artifacts that matched a contact.
+    def correlate(self, module):
+        contact_name_att_type = module.blackboard.getOrAddAttributeType('BMW_CONTACT_NAME_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "Contact Name")
+        skCase = Case.getCurrentCase().getSleuthkitCase()
+        matchCount = 0
+        for key, artifactId in self._references:
+            contacts = self._contacts.get(key)
+            if not contacts:
+                continue
+            names = []
+            for name, contactArtifactId in contacts:
+                if name and name not in names:
+                    names.append(name)
+
+            attributes = ArrayList()
+            attributes.add(BlackboardAttribute(contact_name_att_type, IviBmwDbIngestModuleFactory.moduleName, ", ".join(names)))
+            # Contacts unchanged since the prior image of a differential ingest have no new artifact
+            contactArtifactIds = [contactArtifactId for name, contactArtifactId in contacts if contactArtifactId is not None]
+            if contactArtifactIds:
+                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_ASSOCIATED_ARTIFACT.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, contactArtifactIds[0]))
+            try:
+                art = skCase.getBlackboardArtifact(artifactId)
                 art.addAttributes(attributes)
-                try:
-                    # index the artifact for keyword search
-                    blackboard.indexArtifact(art)
-                except Blackboard.BlackboardException as e:
-                    self.log(Level.SEVERE, "Error indexing artifact " + art.getDisplayName())
+            except TskCoreException as e:
+                module.log(Level.SEVERE, "Error adding the contact of artifact %d (%s)" % (artifactId, e.getMessage()))
+                continue
+            module.indexArtifact(art)
+            matchCount += 1
 
-        #usbdetails
-        artIIId = blackboard.getOrAddArtifactType("TSK_USB_DEVICEDETAILS", "Usb device details")
-        
-        numFiles = len(files)
-        progressBar.switchToDeterminate(numFiles)
-        fileCount = 0
-        for file in files:
+        self._references = []
+        return matchCount
 
-            # Check if the user pressed cancel while we were busy
-            if self.context.isJobCancelled():
-                return IngestModule.ProcessResult.OK
 
-            self.log(Level.INFO, "Processing file: " + file.getName())
-            fileCount += 1
-
-            # Save the DB locally in the temp folder. use file id as name to reduce collisions
-            lclDbPath = os.path.join(Case.getCurrentCase().getTempDirectory(), str(file.getId()) + ".db" )
-            ContentUtils.writeToFile(file, File(lclDbPath))
-                        
-            # Open the DB using JDBC
-            try: 
-                Class.forName("org.sqlite.JDBC").newInstance()
-                dbConn = DriverManager.getConnection("jdbc:sqlite:%s"  % lclDbPath)
-            except SQLException as e:
-                self.log(Level.INFO, "Could not open database file (not SQLite) " + file.getName() + " (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
-            
-            # Query the usbdetails table in the database and get all columns. 
+# Sorted stream of timeline events written by one extractor for one file.
+# Lines are "timestamp<TAB>source<TAB>file id<TAB>artifact id<TAB>description".
+class TimelineRun(object):
+
+    def __init__(self, path, source, file):
+        self.path = path
+        self.source = source
+        self.fileId = file.getId()
+        self._out = codecs.open(path, "w", "utf-8")
+        self._last = None
+        self._sorted = True
+
+    # Events without a usable time (NULL or 0 in the database) are left out
+    def add(self, timestamp, description, art):
+        if not timestamp or timestamp <= 0:
+            return
+        timestamp = long(timestamp)
+        if self._last is not None and timestamp < self._last:
+            self._sorted = False
+        self._last = timestamp
+        if description is None:
+            description = ""
+        description = description.replace("\t", " ").replace("\r", " ").replace("\n", " ")
+        # 0 for a row unchanged since the prior image, which has no new artifact
+        artifactId = 0 if art is None else art.getArtifactID()
+        self._out.write(u"%d\t%s\t%d\t%d\t%s\n" % (timestamp, self.source, self.fileId, artifactId, description))
+
+    def close(self):
+        if self._out is None:
+            return
+        self._out.close()
+        self._out = None
+        # The query sorts on the raw column, so a value that converts out of
+        # order (mixed formats) only costs a local sort of this run
+        if not self._sorted:
+            lines = VehicleTimeline._readLines(self.path)
+            lines.sort(key=lambda event: event[0])
+            out = codecs.open(self.path, "w", "utf-8")
             try:
-                stmt = dbConn.createStatement()
-                resultSet = stmt.executeQuery("SELECT deviceserialno, lastseen FROM usbdevicedetails")
-            except SQLException as e:
-                self.log(Level.INFO, "Error querying database for contacts table (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
+                for event in lines:
+                    out.write(VehicleTimeline._formatLine(event))
+            finally:
+                out.close()
 
-            # Cycle through each row and create artifacts
-            while resultSet.next():
-                try: 
-                    deviceserialno = resultSet.getString("deviceserialno")
-                    lastseen = resultSet.getLong("lastseen")
-                    
-                except SQLException as e:
-                    self.log(Level.INFO, "Error getting values from contacts table (" + e.getMessage() + ")")                
-                
-                # Make an artifact on the blackboard, TSK_DOWNLOAD_SOURCE and give it attributes for each of the fields
-                art = file.newArtifact(artIIId.getTypeID())
-                
-                device_name_att_type = blackboard.getOrAddAttributeType('BMW_DEVICE_NAME_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "deviceserialno")
 
-                attributes = ArrayList()
-                
-                
-               
-                attributes.add(BlackboardAttribute(device_name_att_type,IviBmwDbIngestModuleFactory.moduleName, deviceserialno)) 
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DATETIME_ACCESSED.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, lastseen))
+# Chronological view of the timestamped records posted by the extractors.
+# Every extractor pushes ORDER BY into SQLite and streams its rows into a
+# TimelineRun, the runs are then combined with a heap-based k-way merge that
+# holds a single pending event per run, so memory stays bounded whatever the
+# size of the vehicle history. The merged file can be filtered by time window
+# later without touching the source databases again.
+class VehicleTimeline(object):
 
+    def __init__(self, directory, name):
+        self.directory = directory
+        self.name = name
+        self.path = os.path.join(directory, name + ".tsv")
+        self._runs = []
+        self._lock = threading.Lock()
 
-                art.addAttributes(attributes)
-                try:
-                    # index the artifact for keyword search
-                    blackboard.indexArtifact(art)
-                except Blackboard.BlackboardException as e:
-                    self.log(Level.SEVERE, "Error indexing artifact " + art.getDisplayName())
+    def openRun(self, source, file):
+        with self._lock:
+            run = TimelineRun(os.path.join(self.directory, "%s_run%d.tsv" % (self.name, len(self._runs))), source, file)
+            self._runs.append(run)
+        return run
 
-        #folders 
-        artIIIId = blackboard.getOrAddArtifactType("TSK_FOLDERS", "Folders")
-        
-        numFiles = len(files)
-        progressBar.switchToDeterminate(numFiles)
-        fileCount = 0
-        for file in files:
+    # Merge all runs into the timeline file and remove the run files.
+    # Returns the number of events in the timeline.
+    def merge(self):
+        for run in self._runs:
+            run.close()
+        eventCount = 0
+        out = codecs.open(self.path, "w", "utf-8")
+        try:
+            for event in heapq.merge(*[VehicleTimeline._iterLines(run.path) for run in self._runs]):
+                out.write(VehicleTimeline._formatLine(event))
+                eventCount += 1
+        finally:
+            out.close()
+        for run in self._runs:
+            os.remove(run.path)
+        self._runs = []
+        return eventCount
 
-            # Check if the user pressed cancel while we were busy
-            if self.context.isJobCancelled():
-                return IngestModule.ProcessResult.OK
+    # Events of a merged timeline between startTime and endTime (epoch seconds,
+    # inclusive, None for an open end). The file is sorted, so reading stops at
+    # the first event past the window.
+    @staticmethod
+    def readWindow(path, startTime=None, endTime=None):
+        for event in VehicleTimeline._iterLines(path):
+            if startTime is not None and event[0] < startTime:
+                continue
+            if endTime is not None and event[0] > endTime:
+                break
+            yield event
 
-            self.log(Level.INFO, "Processing file: " + file.getName())
-            fileCount += 1
-
-            # Save the DB locally in the temp folder. use file id as name to reduce collisions
-            lclDbPath = os.path.join(Case.getCurrentCase().getTempDirectory(), str(file.getId()) + ".db" )
-            ContentUtils.writeToFile(file, File(lclDbPath))
-                        
-            # Open the DB using JDBC
-            try: 
-                Class.forName("org.sqlite.JDBC").newInstance()
-                dbConn = DriverManager.getConnection("jdbc:sqlite:%s"  % lclDbPath)
-            except SQLException as e:
-                self.log(Level.INFO, "Could not open database file (not SQLite) " + file.getName() + " (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
-            
-            # Query the folders table in the database and get all columns. 
-            try:
-                stmt = dbConn.createStatement()
-                resultSet = stmt.executeQuery("SELECT foldername, last_sync, basepath FROM folders")
-            except SQLException as e:
-                self.log(Level.INFO, "Error querying database for contacts table (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
+    # Write the events of a time window to a tab separated file for other tools.
+    # Returns the number of events exported.
+    @staticmethod
+    def exportWindow(path, exportPath, startTime=None, endTime=None):
+        eventCount = 0
+        out = codecs.open(exportPath, "w", "utf-8")
+        try:
+            out.write(u"timestamp\tsource\tfile_id\tartifact_id\tdescription\n")
+            for event in VehicleTimeline.readWindow(path, startTime, endTime):
+                out.write(VehicleTimeline._formatLine(event))
+                eventCount += 1
+        finally:
+            out.close()
+        return eventCount
 
-            # Cycle through each row and create artifacts
-            while resultSet.next():
-                try: 
-                    foldername = resultSet.getString("foldername")
-                    last_sync = resultSet.getLong("last_sync")
-                    basepath = resultSet.getString("basepath")
-                    
-                    
-                except SQLException as e:
-                    self.log(Level.INFO, "Error getting values from contacts table (" + e.getMessage() + ")")                
-                
-                # Make an artifact on the blackboard, TSK_DOWNLOAD_SOURCE and give it attributes for each of the fields
-                art = file.newArtifact(artIIIId.getTypeID())
-                
-                folder_name_att_type = blackboard.getOrAddAttributeType('BMW_FOLDER_NAME_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "foldername")
-                
-                attributes = ArrayList()
-                
-                attributes.add(BlackboardAttribute(folder_name_att_type,IviBmwDbIngestModuleFactory.moduleName, foldername)) 
-                timevalue = last_sync/1000000000
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DATETIME_MODIFIED.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, timevalue))
-                attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_PATH.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, basepath))
+    @staticmethod
+    def _formatLine(event):
+        return u"%d\t%s\t%d\t%d\t%s\n" % event
 
-                art.addAttributes(attributes)
-                try:
-                    # index the artifact for keyword search
-                    blackboard.indexArtifact(art)
-                except Blackboard.BlackboardException as e:
-                    self.log(Level.SEVERE, "Error indexing artifact " + art.getDisplayName())
-                
-        #Library albuns        
-        artIIIIId = blackboard.getOrAddArtifactType("TSK_LIBRARY_ALBUNS", "Library albums")
-
-        numFiles = len(files)
-        progressBar.switchToDeterminate(numFiles)
-        fileCount = 0
-        for file in files:
+    @staticmethod
+    def _parseLine(line):
+        timestamp, source, fileId, artifactId, description = line.rstrip("\n").split("\t", 4)
+        return (long(timestamp), source, long(fileId), long(artifactId), description)
 
-            # Check if the user pressed cancel while we were busy
-            if self.context.isJobCancelled():
-                return IngestModule.ProcessResult.OK
+    @staticmethod
+    def _iterLines(path):
+        reader = codecs.open(path, "r", "utf-8")
+        try:
+            for line in reader:
+                yield VehicleTimeline._parseLine(line)
+        finally:
+            reader.close()
 
-            self.log(Level.INFO, "Processing file: " + file.getName())
-            fileCount += 1
-
-            # Save the DB locally in the temp folder. use file id as name to reduce collisions
-            lclDbPath = os.path.join(Case.getCurrentCase().getTempDirectory(), str(file.getId()) + ".db" )
-            ContentUtils.writeToFile(file, File(lclDbPath))
-                        
-            # Open the DB using JDBC
-            try: 
-                Class.forName("org.sqlite.JDBC").newInstance()
-                dbConn = DriverManager.getConnection("jdbc:sqlite:%s"  % lclDbPath)
+    @staticmethod
+    def _readLines(path):
+        return [event for event in VehicleTimeline._iterLines(path)]
+
+
+# Normalised SQLite copy of everything the extractors post, one typed table per
+# extractor, so other tools can query a vehicle without walking the blackboard.
+# Rows go through one prepared statement per table in JDBC batches inside a
+# single transaction, and the indexes are built once after the bulk load.
+class VehicleExport(object):
+
+    # Rows sent to SQLite per JDBC batch
+    batchSize = 1000
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path):
+            os.remove(path)
+        Class.forName("org.sqlite.JDBC").newInstance()
+        self._dbConn = DriverManager.getConnection("jdbc:sqlite:%s" % path)
+        stmt = self._dbConn.createStatement()
+        # Derived data that can always be exported again, skip the journal
+        stmt.execute("PRAGMA journal_mode = OFF")
+        stmt.execute("PRAGMA synchronous = OFF")
+        stmt.close()
+        self._dbConn.setAutoCommit(False)
+        # extractor name -> [prepared insert, pending rows, column types]
+        self._tables = {}
+        self._indexes = []
+        self.rowCount = 0
+        # One connection written from every file ingest thread in the file ingest variant
+        self._lock = threading.Lock()
+
+    def _createTable(self, extractor):
+        columns = ["file_id INTEGER", "file_path TEXT", "artifact_id INTEGER"] + ["%s %s" % column for column in extractor.exportColumns]
+        stmt = self._dbConn.createStatement()
+        stmt.execute("CREATE TABLE IF NOT EXISTS %s (%s)" % (extractor.name, ", ".join(columns)))
+        stmt.close()
+        for column in extractor.exportIndexes:
+            self._indexes.append("CREATE INDEX IF NOT EXISTS %s_%s ON %s (%s)" % (extractor.name, column, extractor.name, column))
+        insert = self._dbConn.prepareStatement("INSERT INTO %s VALUES (%s)" % (extractor.name, ", ".join(["?"] * len(columns))))
+        table = [insert, 0, ["INTEGER", "TEXT", "INTEGER"] + [columnType for columnName, columnType in extractor.exportColumns]]
+        self._tables[extractor.name] = table
+        return table
+
+    # Path of a source database on the image, the same for every image of the vehicle
+    @staticmethod
+    def sourcePath(file):
+        return file.getParentPath() + file.getName()
+
+    # art is None for a row unchanged since the prior image of a differential
+    # ingest, which gets no new artifact
+    def insert(self, extractor, file, art, values):
+        with self._lock:
+            self._insert(extractor, file, art, values)
+
+    def _insert(self, extractor, file, art, values):
+        table = self._tables.get(extractor.name)
+        if table is None:
+            table = self._createTable(extractor)
+        insert, pending, types = table
+        artifactId = None if art is None else art.getArtifactID()
+        for position, value in enumerate((file.getId(), VehicleExport.sourcePath(file), artifactId) + tuple(values)):
+            if value is None:
+                insert.setNull(position + 1, Types.NULL)
+            elif types[position] == "INTEGER":
+                insert.setLong(position + 1, value)
+            elif types[position] == "REAL":
+                insert.setDouble(position + 1, value)
+            else:
+                insert.setString(position + 1, value)
+        insert.addBatch()
+        table[1] = pending + 1
+        if table[1] >= self.batchSize:
+            insert.executeBatch()
+            table[1] = 0
+        self.rowCount += 1
+
+    # Flush the batches, commit the single transaction and build the indexes
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._dbConn is None:
+            return
+        try:
+            for insert, pending, types in self._tables.values():
+                if pending > 0:
+                    insert.executeBatch()
+                insert.close()
+            stmt = self._dbConn.createStatement()
+            for index in self._indexes:
+                stmt.execute(index)
+            stmt.close()
+            self._dbConn.commit()
+        finally:
+            self._dbConn.close()
+            self._dbConn = None
+
+
+# Streaming simplification of a GPS track. The points arrive in time order and
+# are held in a bounded window; every full window goes through a top-down
+# Douglas-Peucker that splits the segment with the largest deviation first and
+# stops at 1/factor of the points, or earlier once no point deviates more than
+# the tolerance. Memory stays bounded whatever the length of the track.
+class TrackSimplifier(object):
+
+    # Points held before the window is simplified
+    windowSize = 500
+    # Deviation in metres under which a point is never kept
+    toleranceMetres = 5.0
+    # Points this close in metres or seconds to the previous one are dropped on arrival
+    minDistanceMetres = 2.0
+    minIntervalSeconds = 1
+    earthRadiusMetres = 6371000.0
+
+    def __init__(self, factor):
+        self.factor = max(1, factor)
+        self._window = []
+        self.inputCount = 0
+        self.outputCount = 0
+
+    # Add a (timestamp, latitude, longitude, altitude, speed) point and return
+    # the points of the track already final
+    def add(self, point):
+        self.inputCount += 1
+        if self._window:
+            previous = self._window[-1]
+            if point[0] - previous[0] < self.minIntervalSeconds or self._distance(previous, point) < self.minDistanceMetres:
+                return []
+        self._window.append(point)
+        if len(self._window) < self.windowSize:
+            return []
+        kept = self._simplify(self._window)
+        # The last point also starts the next window so the pieces join up
+        self._window = [self._window[-1]]
+        self.outputCount += len(kept) - 1
+        return kept[:-1]
+
+    # The remaining points at the end of the track
+    def flush(self):
+        kept = self._simplify(self._window)
+        self._window = []
+        self.outputCount += len(kept)
+        return kept
+
+    def _distance(self, a, b):
+        ax, ay = self._project(a, a[1])
+        bx, by = self._project(b, a[1])
+        return math.hypot(bx - ax, by - ay)
+
+    # Equirectangular projection in metres around the reference latitude,
+    # precise enough over the few kilometres of a window
+    def _project(self, point, referenceLatitude):
+        return (math.radians(point[2]) * math.cos(math.radians(referenceLatitude)) * self.earthRadiusMetres,
+                math.radians(point[1]) * self.earthRadiusMetres)
+
+    def _simplify(self, points):
+        if len(points) <= 2:
+            return list(points)
+        target = max(2, int(math.ceil(len(points) / float(self.factor))))
+        xy = [self._project(point, points[0][1]) for point in points]
+        kept = set([0, len(points) - 1])
+        # (-deviation, start, end, farthest point) of the segments still to split
+        segments = []
+        self._pushSegment(segments, xy, 0, len(points) - 1)
+        while segments and len(kept) < target:
+            negDeviation, start, end, farthest = heapq.heappop(segments)
+            if -negDeviation < self.toleranceMetres:
+                break
+            kept.add(farthest)
+            self._pushSegment(segments, xy, start, farthest)
+            self._pushSegment(segments, xy, farthest, end)
+        return [points[position] for position in sorted(kept)]
+
+    def _pushSegment(self, segments, xy, start, end):
+        if end - start < 2:
+            return
+        (sx, sy), (ex, ey) = xy[start], xy[end]
+        dx, dy = ex - sx, ey - sy
+        lengthSquared = dx * dx + dy * dy
+        farthest, deviation = None, -1.0
+        for position in range(start + 1, end):
+            px, py = xy[position]
+            if lengthSquared == 0:
+                distance = math.hypot(px - sx, py - sy)
+            else:
+                along = max(0.0, min(1.0, ((px - sx) * dx + (py - sy) * dy) / lengthSquared))
+                distance = math.hypot(px - sx - along * dx, py - sy - along * dy)
+            if distance > deviation:
+                farthest, deviation = position, distance
+        heapq.heappush(segments, (-deviation, start, end, farthest))
+
+
+# Offline manufacturer lookup of Bluetooth / MAC addresses from the IEEE OUI
+# registry. The registry is kept in oui.bin next to this module, a compact file
+# of sorted 24 bit prefixes with an index into a table of distinct vendor names:
+#
+#   "OUI1", record count N, vendor count V          (big endian ints)
+#   N records of 3 byte prefix + 2 byte vendor index, sorted by prefix
+#   V int offsets of the vendor names
+#   vendor names, each a 2 byte length and UTF-8 bytes
+#
+# The file is memory-mapped on the first lookup only, so a vehicle without any
+# address costs nothing, and each lookup is a binary search over the records.
+# When oui.bin is missing it is built once from the IEEE MA-L oui.csv
+# (https://standards-oui.ieee.org/oui/oui.csv) if that file is next to the module.
+class OuiRegistry(object):
+
+    magic = "OUI1"
+    recordSize = 5
+    directory = os.path.dirname(os.path.abspath(__file__))
+
+    def __init__(self, binPath=None, csvPath=None):
+        self.binPath = binPath or os.path.join(self.directory, "oui.bin")
+        self.csvPath = csvPath or os.path.join(self.directory, "oui.csv")
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._buffer = None
+        self._recordCount = 0
+        self._vendorCount = 0
+        # prefix -> vendor of the lookups already done
+        self._cache = {}
+        # Why the registry could not be built or read, every lookup then returns None
+        self.error = None
+
+    # Build oui.bin from the IEEE CSV (Registry, Assignment, Organization Name, ...)
+    @staticmethod
+    def build(csvPath, binPath):
+        vendors = {}
+        vendorNames = []
+        records = {}
+        reader = open(csvPath, "rb")
+        try:
+            for line in csv.reader(reader):
+                if len(line) < 3 or len(line[1]) != 6:
+                    continue
+                try:
+                    prefix = int(line[1], 16)
+                except ValueError:
+                    continue
+                name = line[2].strip()
+                if name not in vendors:
+                    vendors[name] = len(vendorNames)
+                    vendorNames.append(name)
+                records[prefix] = vendors[name]
+        finally:
+            reader.close()
+
+        out = open(binPath, "wb")
+        try:
+            out.write(OuiRegistry.magic)
+            out.write(struct.pack(">ii", len(records), len(vendorNames)))
+            for prefix in sorted(records):
+                out.write(struct.pack(">BHH", prefix >> 16, prefix & 0xffff, records[prefix]))
+            encodedNames = [name.decode("utf-8", "replace").encode("utf-8") for name in vendorNames]
+            offset = 0
+            for name in encodedNames:
+                out.write(struct.pack(">i", offset))
+                offset += 2 + len(name)
+            for name in encodedNames:
+                out.write(struct.pack(">H", len(name)))
+                out.write(name)
+        finally:
+            out.close()
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                if not os.path.exists(self.binPath) and os.path.exists(self.csvPath):
+                    OuiRegistry.build(self.csvPath, self.binPath)
+                if not os.path.exists(self.binPath):
+                    return
+                channel = RandomAccessFile(self.binPath, "r").getChannel()
+                try:
+                    buffer = channel.map(FileChannel.MapMode.READ_ONLY, 0, channel.size())
+                finally:
+                    channel.close()
+            except (IOError, OSError, struct.error) as e:
+                self.error = str(e)
+                return
+            except IOException as e:
+                self.error = e.getMessage()
+                return
+            # A truncated file would fail the lookups with an index out of bounds
+            if buffer.limit() < 12:
+                self.error = "truncated " + self.binPath
+                return
+            magic = "".join([chr(buffer.get(position) & 0xff) for position in range(4)])
+            if magic != self.magic:
+                self.error = "not an OUI registry " + self.binPath
+                return
+            recordCount = buffer.getInt(4)
+            vendorCount = buffer.getInt(8)
+            if recordCount < 0 or vendorCount < 0 or buffer.limit() < 12 + recordCount * self.recordSize + vendorCount * 4:
+                self.error = "truncated " + self.binPath
+                return
+            self._recordCount = recordCount
+            self._vendorCount = vendorCount
+            self._buffer = buffer
+
+    # 24 bit prefix of an address written with or without ':', '-' or '.'
+    @staticmethod
+    def prefixOf(address):
+        if not address:
+            return None
+        digits = "".join([c for c in address if c not in ":-. "])
+        if len(digits) < 6:
+            return None
+        try:
+            return int(digits[:6], 16)
+        except ValueError:
+            return None
+
+    # Vendor name of an address, None when unknown or without a registry
+    def lookup(self, address):
+        prefix = OuiRegistry.prefixOf(address)
+        if prefix is None:
+            return None
+        if prefix in self._cache:
+            return self._cache[prefix]
+        if not self._loaded:
+            self._load()
+        vendor = None
+        buffer = self._buffer
+        if buffer is not None:
+            low = 0
+            high = self._recordCount - 1
+            while low <= high:
+                middle = (low + high) // 2
+                position = 12 + middle * self.recordSize
+                recordPrefix = ((buffer.get(position) & 0xff) << 16) | (buffer.getShort(position + 1) & 0xffff)
+                if recordPrefix < prefix:
+                    low = middle + 1
+                elif recordPrefix > prefix:
+                    high = middle - 1
+                else:
+                    vendor = self._vendorName(buffer.getShort(position + 3) & 0xffff)
+                    break
+        self._cache[prefix] = vendor
+        return vendor
+
+    # None when the names table is cut short or the index is out of range
+    def _vendorName(self, vendorIndex):
+        if vendorIndex >= self._vendorCount:
+            return None
+        namesStart = 12 + self._recordCount * self.recordSize + self._vendorCount * 4
+        position = namesStart + self._buffer.getInt(12 + self._recordCount * self.recordSize + vendorIndex * 4)
+        if position < namesStart or position + 2 > self._buffer.limit():
+            return None
+        length = self._buffer.getShort(position) & 0xffff
+        if position + 2 + length > self._buffer.limit():
+            return None
+        name = jarray.zeros(length, "b")
+        # duplicate() keeps the position of the shared buffer untouched between threads
+        view = self._buffer.duplicate()
+        view.position(position + 2)
+        view.get(name)
+        return String(name, "UTF-8")
+
+
+# Directories of the data source by path, so the mount and base paths of the
+# mme tables resolve to files with hash lookups instead of one file search per
+# row. Built with a single case query on the first path resolved. NBT paths
+# carry the head unit's mount point in front of the file system path
+# (/mnt/data/...), so the longest suffix of a path found in the index wins.
+class PathIndex(object):
+
+    # Components a suffix keeps at least, a lone directory name is too common to match
+    minParts = 2
+
+    def __init__(self, dataSource):
+        self.dataSource = dataSource
+        # Resolved from every file ingest thread in the file ingest variant
+        self._lock = threading.Lock()
+        # lower case path -> directories with that path, one per file system
+        self._dirs = None
+        # lower case path looked up -> directories found
+        self._resolved = {}
+        self.error = None
+
+    @staticmethod
+    def _parts(path):
+        return [part for part in path.replace("\\", "/").lower().split("/") if part and part != "."]
+
+    def _build(self):
+        self._dirs = {}
+        skCase = Case.getCurrentCase().getSleuthkitCase()
+        try:
+            dirs = skCase.findAllFilesWhere("data_source_obj_id = %d AND meta_type = %d"
+                % (self.dataSource.getId(), TskData.TSK_FS_META_TYPE_ENUM.TSK_FS_META_TYPE_DIR.getValue()))
+        except TskCoreException as e:
+            self.error = e.getMessage()
+            return
+        for directory in dirs:
+            if directory.getName() in (".", ".."):
+                continue
+            parts = PathIndex._parts(directory.getParentPath() + directory.getName())
+            if parts:
+                self._dirs.setdefault("/".join(parts), []).append(directory)
+
+    # Directories of the data source a path of the head unit points to, [] when
+    # it is not on the image or has fewer than minParts components to match on
+    def resolve(self, path):
+        if not path:
+            return []
+        parts = PathIndex._parts(path)
+        key = "/".join(parts)
+        with self._lock:
+            if self._dirs is None:
+                self._build()
+            found = self._resolved.get(key)
+            if found is None:
+                found = []
+                for start in range(len(parts) - self.minParts + 1):
+                    found = self._dirs.get("/".join(parts[start:]), [])
+                    if found:
+                        break
+                self._resolved[key] = found
+            return found
+
+    # (paths resolved, paths looked up)
+    def counts(self):
+        with self._lock:
+            return (len([found for found in self._resolved.values() if found]), len(self._resolved))
+
+
+# Schema of one SQLite file found by the discovery pass
+class DatabaseFingerprint(object):
+
+    def __init__(self, file):
+        self.file = file
+        # table name -> (column names, row count)
+        self.tables = {}
+        self.fingerprint = None
+        self.error = None
+
+    # Tables and columns only, so copies of the same schema share a fingerprint
+    # whatever their contents
+    def computeFingerprint(self):
+        schema = ";".join(["%s(%s)" % (table, ",".join(sorted(self.tables[table][0]))) for table in sorted(self.tables)])
+        digest = MessageDigest.getInstance("MD5")
+        digest.update(String(schema).getBytes("UTF-8"))
+        self.fingerprint = "".join(["%02x" % (b & 0xff) for b in digest.digest()])[:12]
+
+    def describe(self):
+        return ", ".join(["%s=%d" % (table, self.tables[table][1]) for table in sorted(self.tables)])
+
+
+# Looks at every file of the data source for the SQLite header, whatever its
+# name, and fingerprints the schema of each database it finds. Headers are read
+# and files copied and opened concurrently on a small thread pool, and files
+# larger than maxBytes are only reported, so the I/O spent on any single file
+# stays bounded.
+class SqliteDiscovery(object):
+
+    header = "SQLite format 3\x00"
+    # Largest file copied for fingerprinting
+    maxBytes = 256 * 1024 * 1024
+    threads = 4
+
+    # knownTables are the tables read by the extractors, a database holding
+    # any of them has a known schema
+    def __init__(self, knownTables, tempDir):
+        self.knownTables = set([table.lower() for table in knownTables])
+        self.tempDir = tempDir
+
+    # Regular files of the data source whose size is a whole number of SQLite
+    # pages (512 bytes at least, every page size is a multiple of 512)
+    def findCandidates(self, dataSource):
+        skCase = Case.getCurrentCase().getSleuthkitCase()
+        return skCase.findAllFilesWhere("data_source_obj_id = %d AND meta_type = %d AND size >= 512 AND size %% 512 = 0"
+            % (dataSource.getId(), TskData.TSK_FS_META_TYPE_ENUM.TSK_FS_META_TYPE_REG.getValue()))
+
+    def isSqlite(self, file):
+        buf = jarray.zeros(len(self.header), "b")
+        try:
+            readLen = file.read(buf, 0, len(buf))
+        except TskCoreException:
+            return False
+        if readLen < len(buf):
+            return False
+        return "".join([chr(b & 0xff) for b in buf]) == self.header
+
+    def fingerprint(self, file):
+        result = DatabaseFingerprint(file)
+        if file.getSize() > self.maxBytes:
+            result.error = "larger than %d bytes, not copied" % self.maxBytes
+            return result
+        lclDbPath = os.path.join(self.tempDir, "discovery_%d.db" % file.getId())
+        dbConn = None
+        try:
+            try:
+                ContentUtils.writeToFile(file, File(lclDbPath))
+                dbConn = DriverManager.getConnection("jdbc:sqlite:%s" % lclDbPath)
+                stmt = dbConn.createStatement()
+                resultSet = stmt.executeQuery("SELECT name FROM sqlite_master WHERE type = 'table'")
+                tableNames = []
+                while resultSet.next():
+                    tableNames.append(resultSet.getString("name"))
+                for table in tableNames:
+                    columns = []
+                    resultSet = stmt.executeQuery('PRAGMA table_info("%s")' % table.replace('"', '""'))
+                    while resultSet.next():
+                        columns.append(resultSet.getString("name"))
+                    resultSet = stmt.executeQuery('SELECT COUNT(*) AS row_count FROM "%s"' % table.replace('"', '""'))
+                    resultSet.next()
+                    result.tables[table] = (columns, resultSet.getLong("row_count"))
+                stmt.close()
+                result.computeFingerprint()
+            except (SQLException, IOException) as e:
+                result.error = e.getMessage()
+        finally:
+            if dbConn is not None:
+                dbConn.close()
+            if os.path.exists(lclDbPath):
+                os.remove(lclDbPath)
+        return result
+
+    def isKnown(self, result):
+        for table in result.tables:
+            if table.lower() in self.knownTables:
+                return True
+        return False
+
+    # Fingerprint every SQLite file of the data source. Returns the
+    # DatabaseFingerprint of each one, None if the job was cancelled
+    def run(self, dataSource, context):
+        Class.forName("org.sqlite.JDBC").newInstance()
+        executor = Executors.newFixedThreadPool(self.threads)
+        try:
+            futures = [executor.submit(FingerprintTask(self, file, context)) for file in self.findCandidates(dataSource)]
+            results = []
+            for future in futures:
+                if context.isJobCancelled():
+                    return None
+                result = future.get()
+                if result is not None:
+                    results.append(result)
+            return results
+        finally:
+            executor.shutdownNow()
+
+    # One line per database: path, size, fingerprint, known or unknown and the
+    # row count of every table
+    def writeReport(self, path, results):
+        out = codecs.open(path, "w", "utf-8")
+        try:
+            out.write(u"path\tsize\tfingerprint\tschema\ttables\n")
+            for result in results:
+                if result.error is not None:
+                    status = "error: " + result.error
+                elif self.isKnown(result):
+                    status = "known"
+                else:
+                    status = "unknown"
+                out.write(u"%s\t%d\t%s\t%s\t%s\n" % (result.file.getUniquePath(), result.file.getSize(),
+                    result.fingerprint or "", status, result.describe()))
+        finally:
+            out.close()
+
+
+# Checks the header of one candidate file and fingerprints it on the discovery
+# thread pool. Returns None for a file that is not SQLite or once the job is cancelled
+class FingerprintTask(Callable):
+
+    def __init__(self, discovery, file, context):
+        self.discovery = discovery
+        self.file = file
+        self.context = context
+
+    def call(self):
+        if self.context.isJobCancelled() or not self.discovery.isSqlite(self.file):
+            return None
+        return self.discovery.fingerprint(self.file)
+
+
+# Per-row errors of one extractor run: a count and the first few messages. A
+# broken column or a failing blackboard write then costs a counter increment per
+# row and a single log record per database instead of one record per row.
+class RowErrors(object):
+
+    # Messages kept as examples in the log record
+    maxSamples = 3
+
+    def __init__(self):
+        self.count = 0
+        self.samples = []
+
+    def add(self, message):
+        self.count += 1
+        if len(self.samples) < self.maxSamples:
+            self.samples.append(message)
+
+    def __str__(self):
+        return "%d rows, e.g. %s" % (self.count, "; ".join([str(sample) for sample in self.samples]))
+
+
+# Reads the rows of one extractor query on its own thread and hands them to the
+# ingest thread in batches through a bounded queue. SQLite keeps reading the next
+# rows while the ingest thread creates, attributes and indexes the artifacts of
+# the previous ones, and a full queue blocks the reader until the writer catches up.
+class RowReader(threading.Thread):
+
+    # Marks the end of the rows in the queue
+    _END = object()
+
+    def __init__(self, dbConn, extractor, query, batchSize, queueSize):
+        threading.Thread.__init__(self, name="BMW NBT reader " + extractor.name)
+        self.daemon = True
+        self.error = None
+        self.rowErrors = RowErrors()
+        self._dbConn = dbConn
+        self._extractor = extractor
+        self._query = query
+        self._batchSize = max(1, batchSize)
+        self._queue = Queue.Queue(max(2, queueSize // self._batchSize))
+        self._cancelled = False
+        # Set once the time budget of the extractor ran out
+        self.interrupted = False
+        self._stmt = None
+        self._stmtLock = threading.Lock()
+
+    def run(self):
+        stmt = None
+        try:
+            stmt = self._dbConn.createStatement()
+            with self._stmtLock:
+                self._stmt = stmt
+                if self.interrupted or self._cancelled:
+                    return
+            resultSet = stmt.executeQuery(self._query)
+            batch = []
+            while not self._cancelled and resultSet.next():
+                try:
+                    batch.append(self._extractor.readRow(resultSet))
+                except SQLException as e:
+                    self.rowErrors.add(e.getMessage())
+                    continue
+                if len(batch) >= self._batchSize:
+                    self._put(batch)
+                    batch = []
+            if batch:
+                self._put(batch)
+        except SQLException as e:
+            self.error = e.getMessage()
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            with self._stmtLock:
+                self._stmt = None
+            if stmt is not None:
+                stmt.close()
+            self._put(RowReader._END)
+
+    # Wait for room in the queue, giving up once the writer cancelled
+    def _put(self, item):
+        while not self._cancelled:
+            try:
+                self._queue.put(item, True, 0.1)
+                return
+            except Queue.Full:
+                pass
+
+    # Rows in query order, until the query is exhausted. While SQLite is still
+    # working on the first rows the queue is polled, so isCancelled (the job
+    # cancel check) is seen without waiting for the query
+    def rows(self, isCancelled=None):
+        while True:
+            try:
+                batch = self._queue.get(True, 0.1)
+            except Queue.Empty:
+                if isCancelled is not None and isCancelled():
+                    self.cancel()
+                    return
+                continue
+            if batch is RowReader._END:
+                return
+            for row in batch:
+                yield row
+
+    # Abort the query where SQLite is (sqlite3_interrupt through the JDBC
+    # cancel), called from the budget timer. The rows read so far stay queued
+    def interrupt(self):
+        with self._stmtLock:
+            self.interrupted = True
+            if self._stmt is not None:
+                try:
+                    self._stmt.cancel()
+                except SQLException:
+                    pass
+
+    # Stop reading, abort a query SQLite is still running and release a reader
+    # blocked on a full queue
+    def cancel(self):
+        with self._stmtLock:
+            self._cancelled = True
+            if self._stmt is not None:
+                try:
+                    self._stmt.cancel()
+                except SQLException:
+                    pass
+        try:
+            while True:
+                self._queue.get_nowait()
+        except Queue.Empty:
+            pass
+
+
+# Hands out the statements of the steps that prepare an extractor run (the
+# preview counts, the query plan and the index builds) and cancels every one of
+# them at the deadline, the way RowReader.interrupt stops the query itself.
+# Stands in for the connection where those steps create their statements.
+class StatementGuard(object):
+
+    def __init__(self, dbConn, deadline):
+        self._dbConn = dbConn
+        self._statements = []
+        self._lock = threading.Lock()
+        # Set once the time budget of the extractor ran out
+        self.interrupted = False
+        self._timer = None
+        if deadline is not None:
+            self._timer = threading.Timer(max(0.0, deadline - time.time()), self.interrupt)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def createStatement(self):
+        with self._lock:
+            if self.interrupted:
+                raise SQLException("time budget exceeded")
+            stmt = self._dbConn.createStatement()
+            self._statements.append(stmt)
+            return stmt
+
+    def interrupt(self):
+        with self._lock:
+            self.interrupted = True
+            for stmt in self._statements:
+                try:
+                    if not stmt.isClosed():
+                        stmt.cancel()
+                except SQLException:
+                    pass
+
+    def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+
+
+# Differential ingest against the export (vehicle_<id>.db) of an earlier image
+# of the same vehicle. Every exported row is reduced to a stable key (the path
+# of its source database on the image and the extractor's diffKey columns, or
+# the whole row) and a hash of its values; the prior image's key -> hashes map
+# of an extractor is loaded when it starts, and each new row is then classified
+# with a hash lookup that consumes one prior entry, so rows repeated under one
+# key are matched one for one. Unchanged rows get no new artifact, prior
+# entries left unconsumed are the removed records.
+class SnapshotDiff(object):
+
+    ADDED = "Added since the prior image"
+    CHANGED = "Changed since the prior image"
+    REMOVED = "Removed since the prior image"
+
+    def __init__(self, priorPath):
+        self.priorPath = priorPath
+        self._dbConn = SnapshotDiff.open(priorPath)
+        # Rows classified from every file ingest thread in the file ingest variant
+        self._lock = threading.Lock()
+        # extractor name -> {row key: [row hashes of the prior image not matched yet]}
+        self._prior = {}
+        # extractors that did not read all their rows (row cap, preview, time budget)
+        self._partial = set()
+        # extractor name -> [added, changed, unchanged]
+        self.counts = {}
+
+    # Read-only connection to a prior export, so a wrong path is an error rather
+    # than a new empty database. Raises IOError or SQLException
+    @staticmethod
+    def open(priorPath):
+        if not os.path.isfile(priorPath):
+            raise IOError("no such file")
+        Class.forName("org.sqlite.JDBC").newInstance()
+        config = SQLiteConfig()
+        config.setReadOnly(True)
+        dbConn = DriverManager.getConnection("jdbc:sqlite:%s" % priorPath, config.toProperties())
+        stmt = dbConn.createStatement()
+        try:
+            stmt.executeQuery("SELECT COUNT(*) FROM sqlite_master").close()
+        except SQLException:
+            dbConn.close()
+            raise
+        finally:
+            stmt.close()
+        return dbConn
+
+    @staticmethod
+    def rowHash(values):
+        text = u"\x1f".join([u"" if value is None else unicode(value) for value in values])
+        return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def rowKey(extractor, source, values, rowHash):
+        if not extractor.diffKey:
+            return u"%s\x1f%s" % (source, rowHash)
+        return u"\x1f".join([source] + [u"" if values[position] is None else unicode(values[position])
+                                         for position, (name, columnType) in enumerate(extractor.exportColumns) if name in extractor.diffKey])
+
+    # (source path, values) of the rows of the extractor's table in the prior
+    # export, typed like exportRow
+    def _priorRows(self, extractor):
+        stmt = self._dbConn.createStatement()
+        try:
+            resultSet = stmt.executeQuery('SELECT file_path, %s FROM "%s"' % (", ".join([name for name, columnType in extractor.exportColumns]), extractor.name))
+            while resultSet.next():
+                values = []
+                for position, (name, columnType) in enumerate(extractor.exportColumns):
+                    if columnType == "INTEGER":
+                        value = resultSet.getLong(position + 2)
+                    elif columnType == "REAL":
+                        value = resultSet.getDouble(position + 2)
+                    else:
+                        value = resultSet.getString(position + 2)
+                    values.append(None if resultSet.wasNull() else value)
+                yield (resultSet.getString(1), tuple(values))
+        finally:
+            stmt.close()
+
+    # Load the prior rows of an extractor before its first database
+    def prepare(self, extractor):
+        with self._lock:
+            if extractor.name in self._prior:
+                return
+            prior = {}
+            try:
+                for source, values in self._priorRows(extractor):
+                    rowHash = SnapshotDiff.rowHash(values)
+                    prior.setdefault(SnapshotDiff.rowKey(extractor, source, values, rowHash), []).append(rowHash)
+            except SQLException as e:
+                # Not extracted from the prior image, every row is new
+                pass
+            self._prior[extractor.name] = prior
+            self.counts[extractor.name] = [0, 0, 0]
+
+    # ADDED, CHANGED, or None for a row of the source database unchanged since
+    # the prior image
+    def classify(self, extractor, source, values):
+        rowHash = SnapshotDiff.rowHash(values)
+        rowKey = SnapshotDiff.rowKey(extractor, source, values, rowHash)
+        with self._lock:
+            priorHashes = self._prior[extractor.name].get(rowKey)
+            counts = self.counts[extractor.name]
+            if not priorHashes:
+                counts[0] += 1
+                return SnapshotDiff.ADDED
+            if rowHash in priorHashes:
+                priorHashes.remove(rowHash)
+                counts[2] += 1
+                return None
+            priorHashes.pop()
+            counts[1] += 1
+            return SnapshotDiff.CHANGED
+
+    def markPartial(self, extractor):
+        with self._lock:
+            self._partial.add(extractor.name)
+
+    # (extractor, source path, prior values) of the records of the prior image
+    # that are gone, for the extractors that read all their rows. Extractors that
+    # found no database in this image are loaded here, all their prior rows are gone
+    def removedRows(self, extractors):
+        for extractor in extractors:
+            if not extractor.exportColumns or extractor.name in self._partial:
+                continue
+            self.prepare(extractor)
+            remaining = self._prior[extractor.name]
+            if not [rowHashes for rowHashes in remaining.values() if rowHashes]:
+                continue
+            for source, values in self._priorRows(extractor):
+                rowHash = SnapshotDiff.rowHash(values)
+                rowHashes = remaining.get(SnapshotDiff.rowKey(extractor, source, values, rowHash))
+                if rowHashes and rowHash in rowHashes:
+                    rowHashes.remove(rowHash)
+                    yield (extractor, source, values)
+
+    def close(self):
+        if self._dbConn is not None:
+            self._dbConn.close()
+            self._dbConn = None
+
+
+# Watchlists of phone numbers, IMEIs, Bluetooth addresses, domains and keywords
+# checked against every value extracted. The list file has one "kind,value[,list
+# name]" row per entry, kind being phone, imei, mac, domain or keyword, and is
+# compiled once per job: identifiers go into hash sets under canonical keys
+# (the PhoneNumberIndex key for phone numbers), keywords into one Aho-Corasick
+# automaton, so a value is checked in a single pass over its characters however
+# long the lists are.
+class Watchlist(object):
+
+    kinds = ("phone", "imei", "mac", "domain", "keyword")
+    _phonePattern = re.compile(r"^\+?[0-9 ().\-/]{3,}$")
+    _macPattern = re.compile(r"^[0-9A-Fa-f]{2}([:\-. ]?[0-9A-Fa-f]{2}){5}$")
+    _hostPattern = re.compile(r"^(?:[a-z][a-z0-9+.\-]*://)?\.?([^/:?#@\s]+\.[^/:?#@\s]+)", re.IGNORECASE)
+
+    def __init__(self, path):
+        self.path = path
+        # kind -> {canonical value: [(list name, entry as written)]}
+        self._sets = dict([(kind, {}) for kind in self.kinds if kind != "keyword"])
+        # Keyword automaton: goto transitions, failure links and the
+        # (list name, keyword) ending at each state
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        self.entryCount = 0
+        # Rows posted as interesting items from every file ingest thread
+        self._lock = threading.Lock()
+        self.hitCount = 0
+        self._load()
+        self._link()
+
+    def _load(self):
+        reader = open(self.path, "rb")
+        try:
+            for line in csv.reader(reader):
+                if len(line) < 2 or line[0].strip().startswith("#"):
+                    continue
+                kind = line[0].strip().lower()
+                value = line[1].strip().decode("utf-8", "replace")
+                listName = line[2].strip().decode("utf-8", "replace") if len(line) > 2 and line[2].strip() else os.path.basename(self.path)
+                if not value or kind not in self.kinds:
+                    continue
+                if kind == "keyword":
+                    self._addKeyword(value.lower(), (listName, value))
+                else:
+                    key = Watchlist._key(kind, value)
+                    if key is None:
+                        continue
+                    self._sets[kind].setdefault(key, []).append((listName, value))
+                self.entryCount += 1
+        finally:
+            reader.close()
+
+    # Canonical form of a watched identifier, None when the value cannot be one
+    @staticmethod
+    def _key(kind, value):
+        if kind == "phone":
+            if Watchlist._phonePattern.match(value) is None:
+                return None
+            return PhoneNumberIndex.normalize(value)
+        if kind == "imei":
+            # Without the check digit or the software version of an IMEISV
+            digits = "".join([c for c in value if c.isdigit()])
+            if len(digits) < 14 or len(digits) > 16 or len(digits) != len(value.replace(" ", "").replace("-", "")):
+                return None
+            return digits[:14]
+        if kind == "mac":
+            if Watchlist._macPattern.match(value) is None:
+                return None
+            return "".join([c for c in value if c not in ":-. "]).upper()
+        if kind == "domain":
+            match = Watchlist._hostPattern.match(value)
+            if match is None:
+                return None
+            return match.group(1).lower().rstrip(".")
+        return None
+
+    def _addKeyword(self, keyword, entry):
+        state = 0
+        for c in keyword:
+            nextState = self._goto[state].get(c)
+            if nextState is None:
+                nextState = len(self._goto)
+                self._goto[state][c] = nextState
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = nextState
+        self._output[state].append(entry)
+
+    # Failure links in breadth-first order, each state also reporting the
+    # keywords of the longest suffix it fails to
+    def _link(self):
+        queue = list(self._goto[0].values())
+        position = 0
+        while position < len(queue):
+            state = queue[position]
+            position += 1
+            for c, nextState in self._goto[state].items():
+                queue.append(nextState)
+                fallback = self._fail[state]
+                while fallback and c not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nextState] = self._goto[fallback].get(c, 0)
+                self._output[nextState] = self._output[nextState] + self._output[self._fail[nextState]]
+
+    def _keywords(self, text):
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        state = 0
+        for c in text:
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            if output[state]:
+                for entry in output[state]:
+                    yield entry
+
+    # (kind, list name, entry) of every watchlist entry found in the values of a row
+    def match(self, values):
+        hits = []
+        for value in values:
+            if not isinstance(value, basestring) or not value:
+                continue
+            for kind, entries in self._sets.items():
+                if not entries:
+                    continue
+                key = Watchlist._key(kind, value)
+                if key is None:
+                    continue
+                found = entries.get(key)
+                if found is None and kind == "domain":
+                    # Subdomains of a watched domain
+                    labels = key.split(".")
+                    for start in range(1, len(labels) - 1):
+                        found = entries.get(".".join(labels[start:]))
+                        if found is not None:
+                            break
+                if found is not None:
+                    hits.extend([(kind, listName, entry) for listName, entry in found])
+            if len(self._goto) > 1:
+                hits.extend([("keyword", listName, entry) for listName, entry in self._keywords(value.lower())])
+        return hits
+
+    def countHit(self):
+        with self._lock:
+            self.hitCount += 1
+
+
+# Hashes of stock NBT databases, byte-identical on every vehicle with the same
+# firmware, that are not worth copying or parsing again. known_dbs.txt next to
+# this module holds one lower case MD5 per line, sorted, so each record is 33
+# bytes and a lookup is a binary search with seeks. A Bloom filter over the same
+# hashes (known_dbs.bloom, rebuilt whenever the text file is newer) answers
+# most lookups of unknown databases without touching the file. Both are loaded
+# on the first lookup.
+class KnownDbHashSet(object):
+
+    directory = os.path.dirname(os.path.abspath(__file__))
+    recordSize = 33
+    # About 1% false positives, each one only costs a binary search
+    bitsPerHash = 10
+    probeCount = 7
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(self.directory, "known_dbs.txt")
+        self.bloomPath = os.path.splitext(self.path)[0] + ".bloom"
+        # Lookups come from every file ingest thread and share one file position
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._bits = None
+        self._bitCount = 0
+        self._records = None
+        self._recordCount = 0
+
+    @staticmethod
+    def _isHash(value):
+        return len(value) == 32 and all([c in "0123456789abcdef" for c in value])
+
+    # Bit positions of a hash, by double hashing on slices of the MD5 itself
+    def _probes(self, md5):
+        first = int(md5[0:8], 16)
+        step = int(md5[8:16], 16) | 1
+        return [(first + probe * step) % self._bitCount for probe in range(self.probeCount)]
+
+    def _load(self):
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        if (os.path.getsize(self.path) % self.recordSize != 0 or not os.path.exists(self.bloomPath) or
+            os.path.getmtime(self.bloomPath) < os.path.getmtime(self.path)):
+            self._buildBloom()
+        bloom = open(self.bloomPath, "rb")
+        try:
+            self._bitCount = struct.unpack(">i", bloom.read(4))[0]
+            self._bits = bytearray(bloom.read())
+        finally:
+            bloom.close()
+        self._recordCount = os.path.getsize(self.path) // self.recordSize
+        self._records = open(self.path, "rb")
+
+    # Write the Bloom filter of the text file, sorting and cleaning the file
+    # first when it was edited by hand
+    def _buildBloom(self):
+        hashes = self._readHashes()
+        if hashes != sorted(set(hashes)) or os.path.getsize(self.path) != len(hashes) * self.recordSize:
+            hashes = sorted(set(hashes))
+            self._writeHashes(hashes)
+        self._bitCount = max(64, len(hashes) * self.bitsPerHash)
+        self._bits = bytearray((self._bitCount + 7) // 8)
+        for md5 in hashes:
+            for position in self._probes(md5):
+                self._bits[position >> 3] |= 1 << (position & 7)
+        bloom = open(self.bloomPath, "wb")
+        try:
+            bloom.write(struct.pack(">i", self._bitCount))
+            bloom.write(bytes(self._bits))
+        finally:
+            bloom.close()
+
+    # Binary mode on both sides, so every record is 32 hex digits and "\n" (33
+    # bytes) on every platform; a file edited with "\r\n" line ends is rewritten
+    def _readHashes(self):
+        hashes = []
+        reader = open(self.path, "rb")
+        try:
+            for line in reader:
+                md5 = line.strip().lower()
+                if KnownDbHashSet._isHash(md5):
+                    hashes.append(md5)
+        finally:
+            reader.close()
+        return hashes
+
+    def _writeHashes(self, hashes):
+        out = open(self.path + ".tmp", "wb")
+        try:
+            for md5 in hashes:
+                out.write(md5 + "\n")
+        finally:
+            out.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.rename(self.path + ".tmp", self.path)
+
+    def contains(self, md5):
+        md5 = md5.lower()
+        if not KnownDbHashSet._isHash(md5):
+            return False
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if self._records is None:
+                return False
+            for position in self._probes(md5):
+                if not self._bits[position >> 3] & (1 << (position & 7)):
+                    return False
+            low = 0
+            high = self._recordCount - 1
+            while low <= high:
+                middle = (low + high) // 2
+                self._records.seek(middle * self.recordSize)
+                record = self._records.read(32)
+                if record < md5:
+                    low = middle + 1
+                elif record > md5:
+                    high = middle - 1
+                else:
+                    return True
+            return False
+
+    # Merge new hashes into the set, from a reference vehicle or a previous case.
+    # Returns the number of hashes added
+    def add(self, hashes):
+        with self._lock:
+            self.close()
+            known = self._readHashes() if os.path.exists(self.path) else []
+            merged = sorted(set(known) | set([md5.lower() for md5 in hashes if KnownDbHashSet._isHash(md5.lower())]))
+            self._writeHashes(merged)
+            if os.path.exists(self.bloomPath):
+                os.remove(self.bloomPath)
+            return len(merged) - len(set(known))
+
+    def close(self):
+        if self._records is not None:
+            self._records.close()
+        self._records = None
+        self._bits = None
+        self._loaded = False
+
+
+# Indexes added to the local copy of a database before an extractor queries it.
+# The head unit databases often lack indexes on the join and sort columns, so
+# SQLite scans the inner table of a join for every outer row, or builds an
+# automatic index that is thrown away after each query. The copy is private to
+# the job, so when EXPLAIN QUERY PLAN shows such a scan of a candidate table
+# and the table is large enough, the index is created once on the copy and
+# every later query on it benefits.
+class QueryPlanIndexer(object):
+
+    # Tables with fewer rows are scanned faster than an index is built
+    minRows = 10000
+    _planPattern = re.compile(r"^(SCAN|SEARCH)( TABLE)? (\w+)(.*)$")
+
+    # (table, columns) of the candidate indexes of the extractor created on the
+    # copy, for the query as the job runs it. Returns the names of the indexes created
+    @staticmethod
+    def apply(extractor, query, dbConn):
+        if not extractor.indexColumns:
+            return []
+        plan = QueryPlanIndexer._unindexedTables(query, dbConn)
+        created = []
+        for table, columns in extractor.indexColumns:
+            if table.lower() not in plan or QueryPlanIndexer._rowCount(dbConn, table) < QueryPlanIndexer.minRows:
+                continue
+            name = "nbt_%s_%s" % (table, "_".join(columns))
+            stmt = dbConn.createStatement()
+            try:
+                stmt.execute('CREATE INDEX IF NOT EXISTS "%s" ON "%s" (%s)' % (name, table, ", ".join(['"%s"' % column for column in columns])))
+            finally:
+                stmt.close()
+            created.append(name)
+        return created
+
+    # Lower case names of the tables the plan reads with a full scan or
+    # through an automatic index
+    @staticmethod
+    def _unindexedTables(query, dbConn):
+        tables = set()
+        stmt = dbConn.createStatement()
+        try:
+            resultSet = stmt.executeQuery("EXPLAIN QUERY PLAN " + query)
+            while resultSet.next():
+                match = QueryPlanIndexer._planPattern.match(resultSet.getString("detail"))
+                if match is None:
+                    continue
+                operation, table, rest = match.group(1), match.group(3), match.group(4)
+                if "AUTOMATIC" in rest or (operation == "SCAN" and "INDEX" not in rest):
+                    tables.add(table.lower())
+        finally:
+            stmt.close()
+        return tables
+
+    @staticmethod
+    def _rowCount(dbConn, table):
+        stmt = dbConn.createStatement()
+        try:
+            resultSet = stmt.executeQuery('SELECT COUNT(*) AS row_count FROM "%s"' % table)
+            resultSet.next()
+            return resultSet.getLong("row_count")
+        finally:
+            stmt.close()
+
+
+# One table of an NBT database turned into blackboard artifacts. Subclasses give
+# the file name pattern, the query and how a row becomes an artifact, the ingest
+# module takes care of finding, copying and opening the databases.
+class NbtExtractor(object):
+
+    # Key of the extractor in logs and settings
+    name = None
+    # Default run order, lowest first: call logs, devices and messages are
+    # cheap and evidentially critical, bulk media and web data come last
+    priority = 3
+    filePattern = None
+    query = None
+    # Source name of the timeline events, None when the rows have no time
+    timelineSource = None
+    # One artifact per media library row, only run when the full media detail is asked for
+    detail = False
+    # Main table of the query and the SQL expression giving its row time in epoch
+    # seconds, used for the cheap row counts and date ranges of the triage preview
+    table = None
+    timeExpression = None
+    # (name, SQL type) of the columns in the vehicle export, one per exportRow value,
+    # and the columns indexed there
+    exportColumns = ()
+    exportIndexes = ()
+    # Export columns identifying a record between two images of the vehicle in a
+    # differential ingest, () when only the whole row does
+    diffKey = ()
+    # (table, columns) of the indexes the query would use, added to a large
+    # table of the local copy that the query plan scans without one
+    indexColumns = ()
+    # Column of the row time in the unit and format of the source, compared with
+    # the time window of the job in the query itself; None for undated rows,
+    # which are always read
+    timeColumn = None
+    # Units of timeColumn per second
+    timeScale = 1
+
+    # Look up the artifact and attribute types once per job
+    def startUp(self, blackboard):
+        pass
+
+    # Values of the current row as a tuple. Runs on the reader thread
+    def readRow(self, resultSet):
+        raise NotImplementedError
+
+    # Make and index the artifact of a row, None when the row is only gathered
+    # into a later artifact. Runs on the ingest thread
+    def postArtifact(self, module, file, row):
+        raise NotImplementedError
+
+    # Feed a row unchanged since the prior image of a differential ingest, which
+    # gets no new artifact, into the indexes of the job postArtifact fills
+    def indexRow(self, module, file, row):
+        pass
+
+    # (epoch seconds, description) of the row for the vehicle timeline
+    def timelineEvent(self, row):
+        return (None, None)
+
+    # Values of the row for the vehicle export, times in epoch seconds
+    def exportRow(self, row):
+        return row
+
+    # Values of the row checked against the watchlist, the export values unless
+    # a column holds several values
+    def watchValues(self, row):
+        return self.exportRow(row)
+
+    # Post what the extractor still holds once the last row of a database was read
+    def finish(self, module, file):
+        pass
+
+    # Value of timeColumn at a time in epoch seconds
+    def nativeTime(self, epochSeconds):
+        return epochSeconds * self.timeScale
+
+    # SQL condition keeping the rows from start up to end (epoch seconds, None
+    # for an open bound), None when the extractor reads every row
+    def windowPredicate(self, start, end):
+        if self.timeColumn is None:
+            return None
+        bounds = []
+        for operator, epochSeconds in ((">=", start), ("<", end)):
+            if epochSeconds is None:
+                continue
+            value = self.nativeTime(epochSeconds)
+            if isinstance(value, basestring):
+                value = "'%s'" % value
+            bounds.append("%s %s %s" % (self.timeColumn, operator, value))
+        if not bounds:
+            return None
+        return " AND ".join(bounds)
+
+    # The query restricted to the time window, the condition going in front of
+    # the final ORDER BY of queries without a WHERE clause of their own
+    def windowQuery(self, start, end):
+        predicate = self.windowPredicate(start, end)
+        if predicate is None:
+            return self.query
+        position = self.query.rfind(" ORDER BY ")
+        if position < 0:
+            position = len(self.query)
+        return "%s WHERE %s%s" % (self.query[:position], predicate, self.query[position:])
+
+
+#contacts
+class ContactExtractor(NbtExtractor):
+
+    name = "contacts"
+    priority = 1
+    filePattern = "contactbook_%.db"
+    table = "contact_card_phone"
+    query = ("SELECT contact_card_phone.Contact_ID, "
+             "contact_card_phone.GivenName, contact_card_phone.FamilyName, "
+             "contact_card_phone.Url, contact_card_phone.organisation FROM contact_card_phone "
+             "ORDER BY contact_card_phone.GivenName")
+    exportColumns = (("contact_id", "TEXT"), ("given_name", "TEXT"), ("family_name", "TEXT"), ("url", "TEXT"), ("organisation", "TEXT"))
+    diffKey = ("contact_id",)
+    exportIndexes = ("contact_id",)
+    indexColumns = (("contact_card_phone", ("GivenName",)),)
+
+    def startUp(self, blackboard):
+        self.family_name_att_type = blackboard.getOrAddAttributeType('BMW_FAMILY_NAME_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "FamilyName")
+
+    def readRow(self, resultSet):
+        return (resultSet.getString("Contact_ID"),
+                resultSet.getString("GivenName"),
+                resultSet.getString("FamilyName"),
+                resultSet.getString("Url"),
+                resultSet.getString("organisation"))
+
+    def postArtifact(self, module, file, row):
+        Contact_ID, GivenName, FamilyName, Url, organisation = row
+
+        # Make an artifact on the blackboard, TSK_CONTACT and give it attributes for each of the fields
+        art = file.newArtifact(BlackboardArtifact.ARTIFACT_TYPE.TSK_CONTACT)
+        attributes = ArrayList()
+
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_USER_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, Contact_ID))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, GivenName))
+        attributes.add(BlackboardAttribute(self.family_name_att_type,IviBmwDbIngestModuleFactory.moduleName, FamilyName))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_URL.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, Url))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_ORGANIZATION.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, organisation))
+
+        art.addAttributes(attributes)
+        module.indexArtifact(art)
+        return art
+
+
+#contact phone
+class ContactPhoneExtractor(NbtExtractor):
+
+    name = "contact_phone"
+    priority = 1
+    filePattern = "contactbook_%.db"
+    table = "phone_data_phone"
+    query = ("SELECT contact_card_phone.Contact_ID, contact_card_phone.GivenName, "
+             "contact_card_phone.FamilyName, contact_card_phone.AdditionalName, "
+             "contact_card_phone.Url, contact_card_phone.organisation, "
+             "phone_data_phone.PhoneNumber FROM contact_card_phone "
+             "JOIN phone_data_phone ON contact_card_phone.Contact_ID = phone_data_phone.Contact_ID "
+             "ORDER BY contact_card_phone.GivenName")
+    exportColumns = (("contact_id", "TEXT"), ("given_name", "TEXT"), ("family_name", "TEXT"), ("phone_number", "TEXT"))
+    diffKey = ("contact_id", "phone_number")
+    exportIndexes = ("contact_id", "phone_number")
+    indexColumns = (("phone_data_phone", ("Contact_ID", "PhoneNumber")), ("contact_card_phone", ("GivenName",)))
+
+    def startUp(self, blackboard):
+        self.artType = blackboard.getOrAddArtifactType("TSK_CONTACT_PHONE", "Contact Phone")
+        self.family_name_att_type = blackboard.getOrAddAttributeType('BMW_FAMILY_NAME_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "FamilyName")
+
+    def readRow(self, resultSet):
+        return (resultSet.getString("Contact_ID"),
+                resultSet.getString("GivenName"),
+                resultSet.getString("FamilyName"),
+                resultSet.getString("PhoneNumber"))
+
+    def postArtifact(self, module, file, row):
+        Contact_ID, GivenName, FamilyName, PhoneNumber = row
+
+        # Make an artifact on the blackboard, TSK_CONTACT_PHONE and give it attributes for each of the fields
+        art = file.newArtifact(self.artType.getTypeID())
+        attributes = ArrayList()
+
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_USER_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, Contact_ID))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, GivenName))
+        attributes.add(BlackboardAttribute(self.family_name_att_type,IviBmwDbIngestModuleFactory.moduleName, FamilyName))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_PHONE_NUMBER.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, PhoneNumber))
+
+        art.addAttributes(attributes)
+        module.indexArtifact(art)
+
+        module.phoneIndex.addContact(PhoneNumber, art, " ".join([n for n in (GivenName, FamilyName) if n]))
+        return art
+
+    # The contact still names the calls and messages of its number
+    def indexRow(self, module, file, row):
+        Contact_ID, GivenName, FamilyName, PhoneNumber = row
+        module.phoneIndex.addContact(PhoneNumber, None, " ".join([n for n in (GivenName, FamilyName) if n]))
+
+
+#contact email
+class ContactEmailExtractor(NbtExtractor):
+
+    name = "contact_email"
+    priority = 1
+    filePattern = "contactbook_%.db"
+    table = "msg_data_phone"
+    query = ("SELECT contact_card_phone.Contact_ID, contact_card_phone.GivenName, "
+             "contact_card_phone.FamilyName, msg_data_phone.EmailAddr FROM contact_card_phone "
+             "JOIN msg_data_phone ON contact_card_phone.Contact_ID = msg_data_phone.Contact_ID "
+             "ORDER BY contact_card_phone.GivenName")
+    exportColumns = (("contact_id", "TEXT"), ("given_name", "TEXT"), ("family_name", "TEXT"), ("email", "TEXT"))
+    diffKey = ("contact_id", "email")
+    exportIndexes = ("contact_id", "email")
+    indexColumns = (("msg_data_phone", ("Contact_ID", "EmailAddr")), ("contact_card_phone", ("GivenName",)))
+
+    def startUp(self, blackboard):
+        self.artType = blackboard.getOrAddArtifactType("TSK_CONTACT_EMAIL", "Contact Email")
+        self.family_name_att_type = blackboard.getOrAddAttributeType('BMW_FAMILY_NAME_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "FamilyName")
+
+    def readRow(self, resultSet):
+        return (resultSet.getString("Contact_ID"),
+                resultSet.getString("GivenName"),
+                resultSet.getString("FamilyName"),
+                resultSet.getString("EmailAddr"))
+
+    def postArtifact(self, module, file, row):
+        Contact_ID, GivenName, FamilyName, EmailAddr = row
+
+        # Make an artifact on the blackboard, TSK_CONTACT_EMAIL and give it attributes for each of the fields
+        art = file.newArtifact(self.artType.getTypeID())
+        attributes = ArrayList()
+
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_USER_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, Contact_ID))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, GivenName))
+        attributes.add(BlackboardAttribute(self.family_name_att_type,IviBmwDbIngestModuleFactory.moduleName, FamilyName))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_EMAIL.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, EmailAddr))
+
+        art.addAttributes(attributes)
+        module.indexArtifact(art)
+        return art
+
+
+#contact address
+class ContactAddressExtractor(NbtExtractor):
+
+    name = "contact_address"
+    priority = 1
+    filePattern = "contactbook_%.db"
+    table = "address_phone"
+    query = ("SELECT contact_card_phone.Contact_ID, contact_card_phone.GivenName, "
+             "contact_card_phone.FamilyName, contact_card_phone.AdditionalName, "
+             "contact_card_phone.Url, contact_card_phone.organisation, "
+             "address_phone.StreetHousenumber, address_phone.City, "
+             "address_phone.Country, address_phone.Postalcode FROM contact_card_phone "
+             "JOIN address_phone ON contact_card_phone.Contact_ID = address_phone.Contact_ID "
+             "WHERE address_phone.crosssum > 0 "
+             "ORDER BY contact_card_phone.GivenName")
+    exportColumns = (("contact_id", "TEXT"), ("given_name", "TEXT"), ("family_name", "TEXT"), ("street", "TEXT"), ("city", "TEXT"), ("country", "TEXT"), ("postal_code", "TEXT"))
+    exportIndexes = ("contact_id",)
+    indexColumns = (("address_phone", ("Contact_ID",)), ("contact_card_phone", ("GivenName",)))
+
+    def startUp(self, blackboard):
+        self.artType = blackboard.getOrAddArtifactType("TSK_CONTACT_ADDRESS", "Contact Address")
+        self.postal_code_att_type = blackboard.getOrAddAttributeType('BMW_POSTAL_CODE_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "PostalCode")
+        self.family_name_att_type = blackboard.getOrAddAttributeType('BMW_FAMILY_NAME_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "FamilyName")
+
+    def readRow(self, resultSet):
+        return (resultSet.getString("Contact_ID"),
+                resultSet.getString("GivenName"),
+                resultSet.getString("FamilyName"),
+                resultSet.getString("StreetHousenumber"),
+                resultSet.getString("City"),
+                resultSet.getString("Country"),
+                resultSet.getString("Postalcode"))
+
+    def postArtifact(self, module, file, row):
+        Contact_ID, GivenName, FamilyName, StreetHousenumber, City, Country, Postalcode = row
+
+        # Make an artifact on the blackboard, TSK_CONTACT_ADDRESS and give it attributes for each of the fields
+        art = file.newArtifact(self.artType.getTypeID())
+        attributes = ArrayList()
+
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_USER_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, Contact_ID))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, GivenName))
+        attributes.add(BlackboardAttribute(self.family_name_att_type,IviBmwDbIngestModuleFactory.moduleName, FamilyName))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_LOCATION.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, StreetHousenumber))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_CITY.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, City))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_COUNTRY.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, Country))
+        attributes.add(BlackboardAttribute(self.postal_code_att_type,IviBmwDbIngestModuleFactory.moduleName, Postalcode))
+
+        art.addAttributes(attributes)
+        module.indexArtifact(art)
+        return art
+
+
+#bluetooth
+class BluetoothExtractor(NbtExtractor):
+
+    name = "bluetooth"
+    priority = 1
+    filePattern = "contactbook_%.db"
+    table = "bluetooth"
+    query = "SELECT Origin, BtAddress FROM bluetooth"
+    exportColumns = (("origin", "TEXT"), ("bt_address", "TEXT"))
+    diffKey = ("bt_address",)
+    exportIndexes = ("bt_address",)
+
+    def startUp(self, blackboard):
+        self.artType = blackboard.getOrAddArtifactType("TSK_BLUETOOTH_ADDRESS", "Bluetooth Address")
+        self.bluetooth_address_att_type = blackboard.getOrAddAttributeType('BMW_BLUETOOTH_ADDRESS_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "BtAddress")
+        self.vendor_att_type = blackboard.getOrAddAttributeType('BMW_VENDOR_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "Vendor")
+
+    def readRow(self, resultSet):
+        return (resultSet.getString("Origin"),
+                resultSet.getString("BtAddress"))
+
+    def postArtifact(self, module, file, row):
+        Origin, BtAddress = row
+
+        # Make an artifact on the blackboard, TSK_BLUETOOTH_ADDRESS and give it attributes for each of the fields
+        art = file.newArtifact(self.artType.getTypeID())
+        attributes = ArrayList()
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, Origin))
+        attributes.add(BlackboardAttribute(self.bluetooth_address_att_type,IviBmwDbIngestModuleFactory.moduleName, BtAddress))
+        vendor = module.ouiRegistry.lookup(BtAddress)
+        if vendor is not None:
+            attributes.add(BlackboardAttribute(self.vendor_att_type,IviBmwDbIngestModuleFactory.moduleName, vendor))
+
+        art.addAttributes(attributes)
+        module.indexArtifact(art)
+        return art
+
+
+#callstacks
+class CallstacksExtractor(NbtExtractor):
+
+    name = "callstacks"
+    priority = 0
+    filePattern = "pm800%.a"
+    table = "CALLSTACKS"
+    timeExpression = "CAST(STRFTIME('%s', TIMESTAMP) AS INTEGER)"
+    timeColumn = "CALLSTACKS.TIMESTAMP"
+    indexColumns = (("CALLSTACKS", ("TIMESTAMP",)),)
+    query = "SELECT CALLSTACKS.ID, CALLSTACKS.FN, CALLSTACKS.TEL_NR, STRFTIME('%s', CALLSTACKS.TIMESTAMP) AS TIMESTAMP FROM CALLSTACKS ORDER BY CALLSTACKS.TIMESTAMP"
+    timelineSource = "CALLSTACKS"
+    exportColumns = (("call_id", "TEXT"), ("name", "TEXT"), ("phone_number", "TEXT"), ("timestamp", "INTEGER"))
+    diffKey = ("call_id",)
+    exportIndexes = ("phone_number", "timestamp")
+
+    def readRow(self, resultSet):
+        FN = resultSet.getString("FN")
+        if FN == None:
+            FN = ""
+        return (resultSet.getString("ID"),
+                FN,
+                resultSet.getString("TEL_NR"),
+                resultSet.getInt("TIMESTAMP"))
+
+    def postArtifact(self, module, file, row):
+        ID, FN, TEL_NR, TIMESTAMP = row
+
+        # Make an artifact on the blackboard, TSK_CALLLOG and give it attributes for each of the fields
+        art = file.newArtifact(BlackboardArtifact.ARTIFACT_TYPE.TSK_CALLLOG)
+        attributes = ArrayList()
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, ID))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, FN))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_PHONE_NUMBER.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, TEL_NR))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DATETIME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, long(TIMESTAMP)))
+
+        art.addAttributes(attributes)
+        module.indexArtifact(art)
+
+        module.phoneIndex.addReference(TEL_NR, art)
+        return art
+
+    # TIMESTAMP is a "YYYY-MM-DD hh:mm:ss" text, compared as text; the time of day
+    # is left out at midnight so a "T" separator in the column compares the same
+    def nativeTime(self, epochSeconds):
+        if epochSeconds % 86400 == 0:
+            return time.strftime("%Y-%m-%d", time.gmtime(epochSeconds))
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(epochSeconds))
+
+    def timelineEvent(self, row):
+        return (row[3], row[2])
+
+
+#bluetooth pairing, BluetoothAddress, EMEI, IMSI, MODEL TELEPHONE
+class DeviceInfoExtractor(NbtExtractor):
+
+    name = "device_info"
+    priority = 0
+    filePattern = "p%.db"
+    table = "CE_DEVICE_INFO"
+    # CE_DEVICE_INFO holds one key/value row per property of a paired phone,
+    # pivoted here into one row per phone (SID). A phone can hold several values
+    # of a key (two SIM cards), every distinct one is kept, separated by valueSeparator
+    valueSeparator = "\x1f"
+    query = ("SELECT SID, "
+             "group_concat(CASE WHEN INFO_KEY = 'IMEI' THEN INFO_VALUE END, char(31)) AS IMEI, "
+             "group_concat(CASE WHEN INFO_KEY = 'IMSI' THEN INFO_VALUE END, char(31)) AS IMSI, "
+             "group_concat(CASE WHEN INFO_KEY = 'BluetoothAddress' THEN INFO_VALUE END, char(31)) AS BluetoothAddress, "
+             "group_concat(CASE WHEN INFO_KEY = 'Model' THEN INFO_VALUE END, char(31)) AS Model "
+             "FROM (SELECT DISTINCT SID, INFO_KEY, INFO_VALUE FROM CE_DEVICE_INFO "
+             "WHERE INFO_KEY IN ('IMEI', 'IMSI', 'BluetoothAddress', 'Model') ORDER BY SID, INFO_KEY, INFO_VALUE) "
+             "GROUP BY SID ORDER BY SID")
+    exportColumns = (("sid", "TEXT"), ("imei", "TEXT"), ("imsi", "TEXT"), ("bt_address", "TEXT"), ("model", "TEXT"))
+    diffKey = ("sid",)
+    exportIndexes = ("sid", "imei", "bt_address")
+    indexColumns = (("CE_DEVICE_INFO", ("SID", "INFO_KEY", "INFO_VALUE")),)
+
+    def startUp(self, blackboard):
+        self.vendor_att_type = blackboard.getOrAddAttributeType('BMW_VENDOR_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "Vendor")
+
+    # Distinct values of a key, () when the phone has none
+    def _values(self, resultSet, column):
+        value = resultSet.getString(column)
+        if not value:
+            return ()
+        return tuple(value.split(self.valueSeparator))
+
+    def readRow(self, resultSet):
+        return (resultSet.getString("SID"),
+                self._values(resultSet, "IMEI"),
+                self._values(resultSet, "IMSI"),
+                self._values(resultSet, "BluetoothAddress"),
+                self._values(resultSet, "Model"))
+
+    def postArtifact(self, module, file, row):
+        SID, IMEI, IMSI, BluetoothAddress, Model = row
+
+        # Make an artifact on the blackboard, TSK_BLUETOOTH_PAIRING and give it an attribute for each value
+        # the phone has, the keys missing from CE_DEVICE_INFO are left out
+        art = file.newArtifact(BlackboardArtifact.ARTIFACT_TYPE.TSK_BLUETOOTH_PAIRING)
+        attributes = ArrayList()
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, SID))
+        for value in IMEI:
+            attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_IMEI.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, value))
+        for value in IMSI:
+            attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_IMSI.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, value))
+        for value in BluetoothAddress:
+            attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DEVICE_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, value))
+            vendor = module.ouiRegistry.lookup(value)
+            if vendor is not None:
+                attributes.add(BlackboardAttribute(self.vendor_att_type,IviBmwDbIngestModuleFactory.moduleName, vendor))
+        for value in Model:
+            attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DEVICE_MODEL.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, value))
+
+        art.addAttributes(attributes)
+        module.indexArtifact(art)
+        return art
+
+    # Several values of a key in one column, "; " separated
+    def exportRow(self, row):
+        SID, IMEI, IMSI, BluetoothAddress, Model = row
+        joined = lambda values: "; ".join(values) if values else None
+        return (SID, joined(IMEI), joined(IMSI), joined(BluetoothAddress), joined(Model))
+
+    # Every value on its own, a joined column never equals a watched IMEI or address
+    def watchValues(self, row):
+        SID, IMEI, IMSI, BluetoothAddress, Model = row
+        return (SID,) + IMEI + IMSI + BluetoothAddress + Model
+
+
+#BROWSER
+class BrowserExtractor(NbtExtractor):
+
+    name = "browser"
+    priority = 4
+    filePattern = "BrowserUrls.db"
+    table = "visits"
+    timeExpression = "datevisit"
+    timeColumn = "visits.datevisit"
+    query = "SELECT urls.id, urls.title, urls.url, visits.datevisit FROM urls LEFT JOIN visits ON visits.urlid = urls.id ORDER BY visits.datevisit"
+    timelineSource = "visits"
+    exportColumns = (("url_id", "TEXT"), ("title", "TEXT"), ("url", "TEXT"), ("date_visit", "INTEGER"))
+    exportIndexes = ("date_visit",)
+    indexColumns = (("visits", ("urlid", "datevisit")),)
+
+    def readRow(self, resultSet):
+        return (resultSet.getString("id"),
+                resultSet.getString("title"),
+                resultSet.getString("url"),
+                resultSet.getInt("datevisit"))
+
+    def postArtifact(self, module, file, row):
+        id, title, url, datevisit = row
+
+        # Make an artifact on the blackboard, TSK_WEB_HISTORY and give it attributes for each of the fields
+        art = file.newArtifact(BlackboardArtifact.ARTIFACT_TYPE.TSK_WEB_HISTORY)
+        attributes = ArrayList()
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, id))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_TITLE.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, title))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_URL.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, url))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DATETIME_ACCESSED.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, datevisit))
+
+        art.addAttributes(attributes)
+        module.indexArtifact(art)
+        return art
+
+    def timelineEvent(self, row):
+        return (row[3], row[2])
+
+
+#COOKIES
+class CookieExtractor(NbtExtractor):
+
+    name = "cookies"
+    priority = 4
+    filePattern = "cookie.db"
+    table = "cookies"
+    timeExpression = "lastAccessed"
+    timeColumn = "cookies.lastAccessed"
+    indexColumns = (("cookies", ("lastAccessed",)),)
+    query = "SELECT cookies.name, cookies.host, cookies.path, cookies.lastAccessed FROM cookies ORDER BY cookies.lastAccessed"
+    timelineSource = "cookies"
+    exportColumns = (("name", "TEXT"), ("host", "TEXT"), ("path", "TEXT"), ("last_accessed", "INTEGER"))
+    diffKey = ("name", "host", "path")
+    exportIndexes = ("host", "last_accessed")
+
+    def readRow(self, resultSet):
+        return (resultSet.getString("name"),
+                resultSet.getString("host"),
+                resultSet.getString("path"),
+                resultSet.getInt("lastAccessed"))
+
+    def postArtifact(self, module, file, row):
+        name, host, path, lastAccessed = row
+
+        # Make an artifact on the blackboard, TSK_WEB_COOKIE and give it attributes for each of the fields
+        art = file.newArtifact(BlackboardArtifact.ARTIFACT_TYPE.TSK_WEB_COOKIE)
+        attributes = ArrayList()
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, name))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_URL.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, host))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_PATH.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, path))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DATETIME_ACCESSED.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, lastAccessed))
+
+        art.addAttributes(attributes)
+        module.indexArtifact(art)
+        return art
+
+    def timelineEvent(self, row):
+        return (row[3], row[1])
+
+
+#messages
+class MessageExtractor(NbtExtractor):
+
+    name = "messages"
+    priority = 0
+    filePattern = "f2%.sqlite"
+    table = "messages"
+    timeExpression = 'CAST(strftime("%s", substr(date,1,4) || "-" || substr(date,5,2) || "-" || substr(date,7,2) || "T" || substr(date,9,2) || ":" || substr(date,11,2) || ":" || substr(date,13,2)) AS INTEGER)'
+    query = 'SELECT messages.id, messages.fromPhoneNumber, strftime("%s", substr(date,1,4) || "-" || substr(date,5,2) || "-" || substr(date,7,2) || "T" || substr(date,9,2) || ":" || substr(date,11,2) || ":" || substr(date,13,2)) as newdate, messages.subject FROM messages ORDER BY messages.date'
+    timelineSource = "messages"
+    # date is a "YYYYMMDDhhmmss" text, compared as text
+    timeColumn = "messages.date"
+    indexColumns = (("messages", ("date",)),)
+    exportColumns = (("message_id", "TEXT"), ("from_phone_number", "TEXT"), ("date", "INTEGER"), ("subject", "TEXT"))
+    diffKey = ("message_id",)
+    exportIndexes = ("from_phone_number", "date")
+
+    def startUp(self, blackboard):
+        self.from_number_att_type = blackboard.getOrAddAttributeType('BMW_FROM_NUMBER_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "fromPhoneNumber")
+
+    def readRow(self, resultSet):
+        return (resultSet.getString("id"),
+                resultSet.getString("fromPhoneNumber"),
+                resultSet.getLong("newdate"),
+                resultSet.getString("subject"))
+
+    def postArtifact(self, module, file, row):
+        id, fromPhoneNumber, date, subject = row
+
+        # Make an artifact on the blackboard, TSK_MESSAGE and give it attributes for each of the fields
+        art = file.newArtifact(BlackboardArtifact.ARTIFACT_TYPE.TSK_MESSAGE)
+        attributes = ArrayList()
+
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, id))
+        attributes.add(BlackboardAttribute(self.from_number_att_type,IviBmwDbIngestModuleFactory.moduleName, fromPhoneNumber))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DATETIME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, date))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_TEXT.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, subject))
+
+        art.addAttributes(attributes)
+        module.postArtifact(art)
+
+        module.phoneIndex.addReference(fromPhoneNumber, art)
+        return art
+
+    def nativeTime(self, epochSeconds):
+        return time.strftime("%Y%m%d%H%M%S", time.gmtime(epochSeconds))
+
+    def timelineEvent(self, row):
+        return (row[2], row[1])
+
+
+#navigation trackpoints, one TSK_GPS_TRACK per trip
+class GpsTrackExtractor(NbtExtractor):
+
+    name = "gps_track"
+    priority = 2
+    filePattern = "nav%.db"
+    table = "trackpoints"
+    timeExpression = "timestamp"
+    query = "SELECT timestamp, latitude, longitude, altitude, speed FROM trackpoints ORDER BY timestamp"
+    timeColumn = "timestamp"
+    indexColumns = (("trackpoints", ("timestamp",)),)
+    # Degrees per stored unit of latitude and longitude
+    coordinateScale = 1.0
+    # Seconds without a point that end a trip
+    tripGapSeconds = 600
+
+    def startUp(self, blackboard):
+        self._simplifier = None
+        self._points = None
+        self._pointCount = 0
+        self._lastTime = None
+        self.trackCount = 0
+
+    def readRow(self, resultSet):
+        altitude = resultSet.getDouble("altitude")
+        if resultSet.wasNull():
+            altitude = None
+        speed = resultSet.getDouble("speed")
+        if resultSet.wasNull():
+            speed = None
+        return (resultSet.getLong("timestamp"),
+                resultSet.getDouble("latitude") * self.coordinateScale,
+                resultSet.getDouble("longitude") * self.coordinateScale,
+                altitude,
+                speed)
+
+    # Trackpoints are only gathered here, each trip is posted once it ends
+    def postArtifact(self, module, file, row):
+        if self._lastTime is not None and row[0] - self._lastTime > self.tripGapSeconds:
+            self._postTrack(module, file)
+        self._lastTime = row[0]
+        if self._simplifier is None:
+            self._simplifier = TrackSimplifier(module.local_settings.getTrackReduction())
+            self._points = GeoTrackPoints()
+            self._pointCount = 0
+        for point in self._simplifier.add(row):
+            self._addPoint(point)
+        return None
+
+    def finish(self, module, file):
+        self._postTrack(module, file)
+        self._lastTime = None
+
+    def _addPoint(self, point):
+        timestamp, latitude, longitude, altitude, speed = point
+        self._points.addPoint(GeoTrackPoints.TrackPoint(latitude, longitude, altitude, None, speed, None, None, long(timestamp)))
+        self._pointCount += 1
+
+    def _postTrack(self, module, file):
+        if self._simplifier is None:
+            return
+        for point in self._simplifier.flush():
+            self._addPoint(point)
+        simplifier, points, pointCount = self._simplifier, self._points, self._pointCount
+        self._simplifier = None
+        self._points = None
+        if pointCount == 0:
+            return
+
+        # Make an artifact on the blackboard, TSK_GPS_TRACK with the simplified trackpoints of the trip
+        self.trackCount += 1
+        attributes = ArrayList()
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_COMMENT.getTypeID(), IviBmwDbIngestModuleFactory.moduleName,
+            "%d of %d trackpoints" % (pointCount, simplifier.inputCount)))
+        try:
+            helper = GeoArtifactsHelper(Case.getCurrentCase().getSleuthkitCase(), IviBmwDbIngestModuleFactory.moduleName, None, file, module.context.getJobId())
+            helper.addTrack("Trip %d" % self.trackCount, points, attributes)
+        except (TskCoreException, BlackboardException) as e:
+            module._artifactError("Error posting GPS track of " + file.getName() + " (" + e.getMessage() + ")")
+
+
+#navigation last destinations
+class DestinationExtractor(NbtExtractor):
+
+    name = "destinations"
+    priority = 2
+    filePattern = "nav%.db"
+    table = "lastdestinations"
+    timeExpression = "timestamp"
+    query = "SELECT name, street, city, latitude, longitude, timestamp FROM lastdestinations ORDER BY timestamp"
+    timeColumn = "timestamp"
+    timelineSource = "lastdestinations"
+    exportColumns = (("name", "TEXT"), ("street", "TEXT"), ("city", "TEXT"), ("latitude", "REAL"), ("longitude", "REAL"), ("timestamp", "INTEGER"))
+    exportIndexes = ("timestamp",)
+
+    def readRow(self, resultSet):
+        return (resultSet.getString("name"),
+                resultSet.getString("street"),
+                resultSet.getString("city"),
+                resultSet.getDouble("latitude") * GpsTrackExtractor.coordinateScale,
+                resultSet.getDouble("longitude") * GpsTrackExtractor.coordinateScale,
+                resultSet.getLong("timestamp"))
+
+    def postArtifact(self, module, file, row):
+        name, street, city, latitude, longitude, timestamp = row
+
+        # Make an artifact on the blackboard, TSK_GPS_SEARCH and give it attributes for each of the fields
+        art = file.newArtifact(BlackboardArtifact.ARTIFACT_TYPE.TSK_GPS_SEARCH)
+        attributes = ArrayList()
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, name))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_LOCATION.getTypeID(), IviBmwDbIngestModuleFactory.moduleName,
+            ", ".join([part for part in (street, city) if part])))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_GEO_LATITUDE.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, latitude))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_GEO_LONGITUDE.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, longitude))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DATETIME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, long(timestamp)))
+
+        art.addAttributes(attributes)
+        module.indexArtifact(art)
+        return art
+
+    def timelineEvent(self, row):
+        return (row[5], row[0])
+
+
+#mme_mediastores
+class MediastoreExtractor(NbtExtractor):
+
+    name = "mediastores"
+    priority = 3
+    filePattern = "mme%"
+    table = "mediastores"
+    timeExpression = "lastseen/1000000000"
+    timeColumn = "mediastores.lastseen"
+    timeScale = 1000000000
+    query = "SELECT msid, lastseen, mssname, name, identifier, mountpath FROM mediastores ORDER BY lastseen"
+    timelineSource = "mediastores"
+    exportColumns = (("msid", "TEXT"), ("last_seen", "INTEGER"), ("mssname", "TEXT"), ("name", "TEXT"), ("identifier", "TEXT"), ("mount_path", "TEXT"))
+    diffKey = ("msid",)
+    exportIndexes = ("identifier", "last_seen")
+
+    def readRow(self, resultSet):
+        return (resultSet.getString("msid"),
+                resultSet.getLong("lastseen"),
+                resultSet.getString("mssname"),
+                resultSet.getString("name"),
+                resultSet.getString("identifier"),
+                resultSet.getString("mountpath"))
+
+    def postArtifact(self, module, file, row):
+        msid, lastseen, mssname, name, identifier, mountpath = row
+
+        # Make an artifact on the blackboard, TSK_DEVICE_INFO and give it attributes for each of the fields
+        art = file.newArtifact(BlackboardArtifact.ARTIFACT_TYPE.TSK_DEVICE_INFO)
+        attributes = ArrayList()
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, msid))
+
+        timevalue = lastseen/1000000000
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DATETIME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, timevalue))
+
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DESCRIPTION.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, mssname))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, name))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DEVICE_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, identifier))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_PATH.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, mountpath))
+        for directory in module.pathIndex.resolve(mountpath):
+            attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_PATH_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, directory.getId()))
+
+        art.addAttributes(attributes)
+        module.indexArtifact(art)
+        return art
+
+    def timelineEvent(self, row):
+        return (row[1]/1000000000, row[3])
+
+    def exportRow(self, row):
+        msid, lastseen, mssname, name, identifier, mountpath = row
+        return (msid, lastseen/1000000000, mssname, name, identifier, mountpath)
+
+
+#music and groups
+class MusicGroupExtractor(NbtExtractor):
+
+    name = "music_groups"
+    priority = 6
+    filePattern = "mme%"
+    table = "categorydata_custom"
+    detail = True
+    query = "SELECT categorydata_custom.name FROM categorydata_custom"
+    exportColumns = (("name", "TEXT"),)
+
+    def startUp(self, blackboard):
+        self.artType = blackboard.getOrAddArtifactType("TSK_MUSIC_GROUPS", "Music Groups")
+
+    def readRow(self, resultSet):
+        return (resultSet.getString("name"),)
+
+    def postArtifact(self, module, file, row):
+        name, = row
+
+        # Make an artifact on the blackboard, TSK_MUSIC_GROUPS and give it attributes for each of the fields
+        art = file.newArtifact(self.artType.getTypeID())
+        attributes = ArrayList()
+
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, name))
+
+        art.addAttributes(attributes)
+        module.indexArtifact(art)
+        return art
+
+
+#software
+class SoftwareExtractor(NbtExtractor):
+
+    name = "software"
+    priority = 3
+    filePattern = "mme%"
+    table = "software_info"
+    query = "SELECT software_info.version FROM software_info"
+    exportColumns = (("version", "TEXT"),)
+
+    def startUp(self, blackboard):
+        self.artType = blackboard.getOrAddArtifactType("TSK_SOFTWARE_INFO", "Software info")
+
+    def readRow(self, resultSet):
+        return (resultSet.getString("version"),)
+
+    def postArtifact(self, module, file, row):
+        version, = row
+
+        # Make an artifact on the blackboard, TSK_SOFTWARE_INFO and give it attributes for each of the fields
+        art = file.newArtifact(self.artType.getTypeID())
+        attributes = ArrayList()
+
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_VERSION.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, version))
+
+        art.addAttributes(attributes)
+        module.indexArtifact(art)
+        return art
+
+
+#usbdetails
+class UsbDeviceExtractor(NbtExtractor):
+
+    name = "usb_devices"
+    priority = 3
+    filePattern = "mme%"
+    table = "usbdevicedetails"
+    timeExpression = "lastseen/1000000000"
+    timeColumn = "usbdevicedetails.lastseen"
+    timeScale = 1000000000
+    indexColumns = (("usbdevicedetails", ("lastseen",)),)
+    query = "SELECT deviceserialno, lastseen FROM usbdevicedetails ORDER BY lastseen"
+    timelineSource = "usbdevicedetails"
+    exportColumns = (("device_serial_no", "TEXT"), ("last_seen", "INTEGER"))
+    diffKey = ("device_serial_no",)
+    exportIndexes = ("device_serial_no", "last_seen")
+
+    def startUp(self, blackboard):
+        self.artType = blackboard.getOrAddArtifactType("TSK_USB_DEVICEDETAILS", "Usb device details")
+        self.device_name_att_type = blackboard.getOrAddAttributeType('BMW_DEVICE_NAME_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "deviceserialno")
+
+    def readRow(self, resultSet):
+        return (resultSet.getString("deviceserialno"),
+                resultSet.getLong("lastseen"))
+
+    def postArtifact(self, module, file, row):
+        deviceserialno, lastseen = row
+
+        # Make an artifact on the blackboard, TSK_USB_DEVICEDETAILS and give it attributes for each of the fields
+        art = file.newArtifact(self.artType.getTypeID())
+        attributes = ArrayList()
+
+        attributes.add(BlackboardAttribute(self.device_name_att_type,IviBmwDbIngestModuleFactory.moduleName, deviceserialno))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DATETIME_ACCESSED.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, lastseen))
+
+        art.addAttributes(attributes)
+        module.indexArtifact(art)
+        return art
+
+    def timelineEvent(self, row):
+        return (row[1]/1000000000, row[0])
+
+    def exportRow(self, row):
+        deviceserialno, lastseen = row
+        return (deviceserialno, lastseen/1000000000)
+
+
+#folders
+class FolderExtractor(NbtExtractor):
+
+    name = "folders"
+    priority = 3
+    filePattern = "mme%"
+    table = "folders"
+    timeExpression = "last_sync/1000000000"
+    timeColumn = "folders.last_sync"
+    timeScale = 1000000000
+    indexColumns = (("folders", ("last_sync",)),)
+    query = "SELECT foldername, last_sync, basepath FROM folders ORDER BY last_sync"
+    timelineSource = "folders"
+    exportColumns = (("folder_name", "TEXT"), ("last_sync", "INTEGER"), ("base_path", "TEXT"))
+    diffKey = ("folder_name", "base_path")
+    exportIndexes = ("last_sync",)
+
+    def startUp(self, blackboard):
+        self.artType = blackboard.getOrAddArtifactType("TSK_FOLDERS", "Folders")
+        self.folder_name_att_type = blackboard.getOrAddAttributeType('BMW_FOLDER_NAME_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "foldername")
+
+    def readRow(self, resultSet):
+        return (resultSet.getString("foldername"),
+                resultSet.getLong("last_sync"),
+                resultSet.getString("basepath"))
+
+    def postArtifact(self, module, file, row):
+        foldername, last_sync, basepath = row
+
+        # Make an artifact on the blackboard, TSK_FOLDERS and give it attributes for each of the fields
+        art = file.newArtifact(self.artType.getTypeID())
+        attributes = ArrayList()
+
+        attributes.add(BlackboardAttribute(self.folder_name_att_type,IviBmwDbIngestModuleFactory.moduleName, foldername))
+        timevalue = last_sync/1000000000
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DATETIME_MODIFIED.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, timevalue))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_PATH.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, basepath))
+        for directory in module.pathIndex.resolve(basepath):
+            attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_PATH_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, directory.getId()))
+
+        art.addAttributes(attributes)
+        module.indexArtifact(art)
+        return art
+
+    def timelineEvent(self, row):
+        return (row[1]/1000000000, row[2])
+
+    def exportRow(self, row):
+        foldername, last_sync, basepath = row
+        return (foldername, last_sync/1000000000, basepath)
+
+
+#Library albuns
+class LibraryAlbumExtractor(NbtExtractor):
+
+    name = "library_albums"
+    priority = 6
+    filePattern = "mme%"
+    table = "library_albums"
+    detail = True
+    query = "SELECT library_albums.album FROM library_albums"
+    exportColumns = (("album", "TEXT"),)
+
+    def startUp(self, blackboard):
+        self.artType = blackboard.getOrAddArtifactType("TSK_LIBRARY_ALBUNS", "Library albums")
+        self.library_albums_att_type = blackboard.getOrAddAttributeType('BMW_LIBRARY_ALBUMS_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "album")
+
+    def readRow(self, resultSet):
+        return (resultSet.getString("album"),)
+
+    def postArtifact(self, module, file, row):
+        album, = row
+
+        # Make an artifact on the blackboard, TSK_LIBRARY_ALBUNS and give it attributes for each of the fields
+        art = file.newArtifact(self.artType.getTypeID())
+        attributes = ArrayList()
+
+        attributes.add(BlackboardAttribute(self.library_albums_att_type,IviBmwDbIngestModuleFactory.moduleName, album))
+
+        art.addAttributes(attributes)
+        module.indexArtifact(art)
+        return art
+
+
+#Library artists
+class LibraryArtistExtractor(NbtExtractor):
+
+    name = "library_artists"
+    priority = 6
+    filePattern = "mme%"
+    table = "library_artists"
+    detail = True
+    query = "SELECT library_artists.artist FROM library_artists"
+    exportColumns = (("artist", "TEXT"),)
+
+    def startUp(self, blackboard):
+        self.artType = blackboard.getOrAddArtifactType("TSK_LIBRARY_ARTISTS", "Library artists")
+        self.library_artists_att_type = blackboard.getOrAddAttributeType('BMW_LIBRARY_ARTISTS_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "artist")
+
+    def readRow(self, resultSet):
+        return (resultSet.getString("artist"),)
+
+    def postArtifact(self, module, file, row):
+        artist, = row
+
+        # Make an artifact on the blackboard, TSK_LIBRARY_ARTISTS and give it attributes for each of the fields
+        art = file.newArtifact(self.artType.getTypeID())
+        attributes = ArrayList()
+
+        attributes.add(BlackboardAttribute(self.library_artists_att_type,IviBmwDbIngestModuleFactory.moduleName, artist))
+
+        art.addAttributes(attributes)
+        module.indexArtifact(art)
+        return art
+
+
+#media library summary
+class MediaLibrarySummaryExtractor(NbtExtractor):
+
+    name = "media_summary"
+    priority = 5
+    filePattern = "mme%"
+    query = ("SELECT (SELECT COUNT(*) FROM library_artists) AS artists, "
+             "(SELECT COUNT(*) FROM library_albums) AS albums, "
+             "(SELECT COUNT(*) FROM categorydata_custom) AS groups, "
+             "(SELECT COUNT(*) FROM mediastores) AS stores, "
+             "(SELECT MIN(lastseen) FROM mediastores WHERE lastseen > 0) AS firstseen, "
+             "(SELECT MAX(lastseen) FROM mediastores) AS lastseen")
+    exportColumns = (("artists", "INTEGER"), ("albums", "INTEGER"), ("music_groups", "INTEGER"), ("mediastores", "INTEGER"), ("first_seen", "INTEGER"), ("last_seen", "INTEGER"))
+
+    def startUp(self, blackboard):
+        self.artType = blackboard.getOrAddArtifactType("TSK_MEDIA_LIBRARY_SUMMARY", "Media library summary")
+        self.artist_count_att_type = blackboard.getOrAddAttributeType('BMW_ARTIST_COUNT_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.INTEGER, "Artists")
+        self.album_count_att_type = blackboard.getOrAddAttributeType('BMW_ALBUM_COUNT_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.INTEGER, "Albums")
+        self.group_count_att_type = blackboard.getOrAddAttributeType('BMW_GROUP_COUNT_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.INTEGER, "Music groups")
+        self.mediastore_count_att_type = blackboard.getOrAddAttributeType('BMW_MEDIASTORE_COUNT_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.INTEGER, "Mediastores")
+
+    def readRow(self, resultSet):
+        return (resultSet.getInt("artists"),
+                resultSet.getInt("albums"),
+                resultSet.getInt("groups"),
+                resultSet.getInt("stores"),
+                resultSet.getLong("firstseen"),
+                resultSet.getLong("lastseen"))
+
+    def postArtifact(self, module, file, row):
+        artists, albums, groups, stores, firstseen, lastseen = row
+
+        # Make an artifact on the blackboard, TSK_MEDIA_LIBRARY_SUMMARY and give it attributes for each of the fields
+        art = file.newArtifact(self.artType.getTypeID())
+        attributes = ArrayList()
+
+        attributes.add(BlackboardAttribute(self.artist_count_att_type,IviBmwDbIngestModuleFactory.moduleName, artists))
+        attributes.add(BlackboardAttribute(self.album_count_att_type,IviBmwDbIngestModuleFactory.moduleName, albums))
+        attributes.add(BlackboardAttribute(self.group_count_att_type,IviBmwDbIngestModuleFactory.moduleName, groups))
+        attributes.add(BlackboardAttribute(self.mediastore_count_att_type,IviBmwDbIngestModuleFactory.moduleName, stores))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DATETIME_START.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, firstseen/1000000000))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DATETIME_END.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, lastseen/1000000000))
+
+        art.addAttributes(attributes)
+        module.indexArtifact(art)
+        return art
+
+    def exportRow(self, row):
+        artists, albums, groups, stores, firstseen, lastseen = row
+        return (artists, albums, groups, stores, firstseen/1000000000, lastseen/1000000000)
+
+
+#mediastore summary
+class MediastoreSummaryExtractor(NbtExtractor):
+
+    name = "mediastore_summary"
+    priority = 5
+    filePattern = "mme%"
+    table = "mediastores"
+    timeExpression = "lastseen/1000000000"
+    timeColumn = "mediastores.lastseen"
+    timeScale = 1000000000
+    # Artists with the most tracks listed for each mediastore
+    topArtists = 5
+    query = ("SELECT mediastores.msid, mediastores.lastseen, mediastores.name, mediastores.identifier, "
+             "(SELECT COUNT(*) FROM library WHERE library.msid = mediastores.msid) AS tracks, "
+             "(SELECT COUNT(DISTINCT library.artist_id) FROM library WHERE library.msid = mediastores.msid) AS artists, "
+             "(SELECT COUNT(DISTINCT library.album_id) FROM library WHERE library.msid = mediastores.msid) AS albums, "
+             "(SELECT group_concat(artist, ', ') FROM (SELECT library_artists.artist AS artist FROM library "
+             "JOIN library_artists ON library.artist_id = library_artists.artist_id "
+             "WHERE library.msid = mediastores.msid GROUP BY library.artist_id "
+             "ORDER BY COUNT(*) DESC LIMIT %d)) AS top_artists "
+             "FROM mediastores ORDER BY mediastores.lastseen" % topArtists)
+    exportColumns = (("msid", "TEXT"), ("last_seen", "INTEGER"), ("name", "TEXT"), ("identifier", "TEXT"), ("tracks", "INTEGER"), ("artists", "INTEGER"), ("albums", "INTEGER"), ("top_artists", "TEXT"))
+    diffKey = ("msid",)
+    exportIndexes = ("identifier", "last_seen")
+    indexColumns = (("library", ("msid", "artist_id", "album_id")),)
+
+    def startUp(self, blackboard):
+        self.artType = blackboard.getOrAddArtifactType("TSK_MEDIASTORE_SUMMARY", "Mediastore summary")
+        self.track_count_att_type = blackboard.getOrAddAttributeType('BMW_TRACK_COUNT_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.INTEGER, "Tracks")
+        self.artist_count_att_type = blackboard.getOrAddAttributeType('BMW_ARTIST_COUNT_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.INTEGER, "Artists")
+        self.album_count_att_type = blackboard.getOrAddAttributeType('BMW_ALBUM_COUNT_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.INTEGER, "Albums")
+        self.top_artists_att_type = blackboard.getOrAddAttributeType('BMW_TOP_ARTISTS_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "Top artists")
+
+    def readRow(self, resultSet):
+        return (resultSet.getString("msid"),
+                resultSet.getLong("lastseen"),
+                resultSet.getString("name"),
+                resultSet.getString("identifier"),
+                resultSet.getInt("tracks"),
+                resultSet.getInt("artists"),
+                resultSet.getInt("albums"),
+                resultSet.getString("top_artists"))
+
+    def postArtifact(self, module, file, row):
+        msid, lastseen, name, identifier, tracks, artists, albums, top_artists = row
+
+        # Make an artifact on the blackboard, TSK_MEDIASTORE_SUMMARY and give it attributes for each of the fields
+        art = file.newArtifact(self.artType.getTypeID())
+        attributes = ArrayList()
+
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, msid))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DATETIME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, lastseen/1000000000))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, name))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DEVICE_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, identifier))
+        attributes.add(BlackboardAttribute(self.track_count_att_type,IviBmwDbIngestModuleFactory.moduleName, tracks))
+        attributes.add(BlackboardAttribute(self.artist_count_att_type,IviBmwDbIngestModuleFactory.moduleName, artists))
+        attributes.add(BlackboardAttribute(self.album_count_att_type,IviBmwDbIngestModuleFactory.moduleName, albums))
+        if top_artists is not None:
+            attributes.add(BlackboardAttribute(self.top_artists_att_type,IviBmwDbIngestModuleFactory.moduleName, top_artists))
+
+        art.addAttributes(attributes)
+        module.indexArtifact(art)
+        return art
+
+    def exportRow(self, row):
+        return (row[0], row[1]/1000000000) + row[2:]
+
+
+# Every extractor of the module, in the order they run
+def createExtractors():
+    return [ContactExtractor(), ContactPhoneExtractor(), ContactEmailExtractor(),
+            ContactAddressExtractor(), BluetoothExtractor(), CallstacksExtractor(),
+            DeviceInfoExtractor(), BrowserExtractor(), CookieExtractor(),
+            MessageExtractor(), GpsTrackExtractor(), DestinationExtractor(),
+            MediastoreExtractor(), MediaLibrarySummaryExtractor(),
+            MediastoreSummaryExtractor(), MusicGroupExtractor(), SoftwareExtractor(),
+            UsbDeviceExtractor(), FolderExtractor(), LibraryAlbumExtractor(),
+            LibraryArtistExtractor()]
+
+
+# Memoized getOrAdd of the artifact and attribute types. Every extractor looks
+# its types up when it starts, once per file ingest thread in the file ingest
+# variant, so the case database is only asked once per type and job.
+class BlackboardTypeCache(object):
+
+    def __init__(self, blackboard):
+        self._blackboard = blackboard
+        self._lock = threading.Lock()
+        # (kind, type name) -> artifact or attribute type
+        self._types = {}
+
+    def getOrAddArtifactType(self, name, displayName):
+        return self._get(("artifact", name), lambda: self._blackboard.getOrAddArtifactType(name, displayName))
+
+    def getOrAddAttributeType(self, name, valueType, displayName):
+        return self._get(("attribute", name), lambda: self._blackboard.getOrAddAttributeType(name, valueType, displayName))
+
+    def _get(self, key, lookup):
+        with self._lock:
+            value = self._types.get(key)
+            if value is None:
+                value = lookup()
+                self._types[key] = value
+            return value
+
+
+# What the ingest modules of one job share: the blackboard and its type cache,
+# the local copies of the databases, the content hashes already seen, the phone
+# index, the timeline and the export. The data source module owns one, the file
+# ingest modules of a job (one per file ingest thread) share one through
+# acquire / release and the last one to shut down finishes it.
+class NbtJobState(object):
+
+    _jobsLock = threading.Lock()
+    # ingest job id -> state shared by the file ingest modules of the job
+    _jobs = {}
+
+    def __init__(self, dataSource, settings):
+        self.dataSource = dataSource
+        self.dataSourceId = dataSource.getId()
+        self.settings = settings
+        self.blackboard = Case.getCurrentCase().getServices().getBlackboard()
+        self.types = BlackboardTypeCache(self.blackboard)
+
+        # Phone numbers of contacts, calls and messages, joined once all extractors ran
+        self.phoneIndex = PhoneNumberIndex()
+
+        # Timestamped events of every extractor, merged into one timeline at the end
+        self.moduleDir = os.path.join(Case.getCurrentCase().getModuleDirectory(), IviBmwDbIngestModuleFactory.moduleName)
+        if not os.path.exists(self.moduleDir):
+            os.makedirs(self.moduleDir)
+        # A triage preview holds the first rows only, it must not replace the
+        # timeline and export of a full run
+        suffix = "_preview" if settings.getPreviewMode() else ""
+        self.timeline = VehicleTimeline(self.moduleDir, "timeline_%d%s" % (self.dataSourceId, suffix))
+
+        # Only the records added, changed or removed since an earlier image are posted
+        self.diff = None
+        exportPath = os.path.join(self.moduleDir, "vehicle_%d%s.db" % (self.dataSourceId, suffix))
+        if settings.getPriorExport():
+            self.diff = SnapshotDiff(settings.getPriorExport())
+            # The prior export is read until the end of the job, never overwrite it
+            if os.path.abspath(settings.getPriorExport()) == os.path.abspath(exportPath):
+                exportPath = os.path.join(self.moduleDir, "vehicle_%d%s_diff.db" % (self.dataSourceId, suffix))
+
+        # Typed, indexed copy of the extracted rows for downstream tools
+        self.export = None
+        if settings.getExportDatabase():
+            self.export = VehicleExport(exportPath)
+
+        # Loaded on the first address looked up
+        self.ouiRegistry = OuiRegistry()
+
+        # Directories of the data source the mme tables point to
+        self.pathIndex = PathIndex(dataSource)
+
+        # Compiled once, matched against the values of every row extracted
+        self.watchlist = None
+        if settings.getWatchlist():
+            self.watchlist = Watchlist(settings.getWatchlist())
+
+        # file id -> path of the local copy in the case temp folder
+        self.localDbs = {}
+        # file id -> (MD5, SHA-256) computed while copying
+        self.copyHashes = {}
+        # file id -> MD5 of the files without a hash stored by Autopsy, hashed
+        # before any copy for the known and duplicate checks
+        self.contentMd5s = {}
+        # file ids whose copy hashes are recorded on the blackboard
+        self.recordedCopies = set()
+        # (md5, size) -> first file seen with that content
+        self._canonicalByHash = {}
+        self._hashLock = threading.Lock()
+        self.duplicateCount = 0
+        # Stock databases skipped without extraction
+        self.knownDbs = KnownDbHashSet()
+        self.knownFiles = set()
+        self.knownCount = 0
+        # (extractor name, file name, rows posted) of the runs stopped by their time budget
+        self.overruns = []
+        # (extractor name, file name, row count, first time, last time) of the triage preview
+        self.previewVolumes = []
+        # (start, end) epoch seconds of the rows read, None for an open bound
+        self.timeWindow = settings.getTimeWindow()
+        self._references = 0
+
+    @classmethod
+    def acquire(cls, context, settings):
+        with cls._jobsLock:
+            state = cls._jobs.get(context.getJobId())
+            if state is None:
+                state = NbtJobState(context.getDataSource(), settings)
+                cls._jobs[context.getJobId()] = state
+            state._references += 1
+            return state
+
+    # Returns True for the last module of the job, which finishes the state
+    @classmethod
+    def release(cls, context, state):
+        with cls._jobsLock:
+            state._references -= 1
+            if state._references > 0:
+                return False
+            del cls._jobs[context.getJobId()]
+            return True
+
+    def markKnown(self, file):
+        with self._hashLock:
+            self.knownFiles.add(file.getId())
+            self.knownCount += 1
+
+    # MD5 of every distinct database content extracted by the job
+    def contentHashes(self):
+        with self._hashLock:
+            return [md5 for md5, size in self._canonicalByHash.keys()]
+
+    # The file already seen with the same content, None for the first one
+    def claimContent(self, md5, file):
+        with self._hashLock:
+            key = (md5, file.getSize())
+            canonical = self._canonicalByHash.get(key)
+            if canonical is None:
+                self._canonicalByHash[key] = file
+            elif canonical.getId() == file.getId():
+                # Matched again by the file pattern of another extractor
+                return None
+            else:
+                self.duplicateCount += 1
+            return canonical
+
+
+# Extraction logic shared by the data source ingest module and its file ingest
+# variant: copying and opening the databases, running the extractors over them
+# and finishing the job outputs.
+class NbtIngestModuleBase(object):
+
+    _logger = Logger.getLogger(IviBmwDbIngestModuleFactory.moduleName)
+
+    # Rows read ahead of the artifact writer for each extractor
+    rowQueueSize = 1000
+    # Bytes moved per read of the hashing copy
+    copyBufferSize = 1024 * 1024
+    # Allocated on the first copy and reused for every database of the module
+    _copyBuffer = None
+
+    # The level is checked first, and the calling method is read from the
+    # caller's frame instead of building the whole stack with inspect.stack()
+    def log(self, level, msg):
+        if not self._logger.isLoggable(level):
+            return
+        self._logger.logp(level, self.__class__.__name__, sys._getframe(1).f_code.co_name, msg)
+
+    # Per-job state the extractors reach through the module
+    # Fail the job at startup on the files named in the settings that cannot be read
+    def _checkInputs(self):
+        priorExport = self.local_settings.getPriorExport()
+        if priorExport:
+            try:
+                SnapshotDiff.open(priorExport).close()
+            except IOError as e:
+                raise IngestModuleException("Cannot open the prior export %s (%s)" % (priorExport, e))
             except SQLException as e:
-                self.log(Level.INFO, "Could not open database file (not SQLite) " + file.getName() + " (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
-            
-            # Query the Library albuns table in the database and get all columns. 
+                raise IngestModuleException("Cannot open the prior export %s (%s)" % (priorExport, e.getMessage()))
+        watchlist = self.local_settings.getWatchlist()
+        if watchlist:
             try:
-                stmt = dbConn.createStatement()
-                resultSet = stmt.executeQuery("SELECT library_albums.album FROM library_albums")
+                open(watchlist, "rb").close()
+            except IOError as e:
+                raise IngestModuleException("Cannot read the watchlist %s (%s)" % (watchlist, e))
+
+    def _attachJob(self, job):
+        self.job = job
+        self.blackboard = job.blackboard
+        self.phoneIndex = job.phoneIndex
+        self.timeline = job.timeline
+        self.export = job.export
+        self.ouiRegistry = job.ouiRegistry
+        self.diff = job.diff
+        self.watchlist = job.watchlist
+        self.pathIndex = job.pathIndex
+        self._localDbs = job.localDbs
+
+    # True for a stock database of the known hash set, skipped without being
+    # extracted. A file without a hash stored by Autopsy is hashed from its
+    # content first and only copied once it misses the known hash set
+    def _isKnownDb(self, file):
+        if self.local_settings.getLearnKnownDbs():
+            return False
+        if file.getId() in self.job.knownFiles:
+            return True
+        try:
+            md5 = self._getContentHash(file)
+        except Exception as e:
+            self.log(Level.WARNING, "Could not hash file " + file.getName() + " (" + str(e) + ")")
+            return False
+        if not self.job.knownDbs.contains(md5):
+            return False
+
+        self.log(Level.INFO, "Skipping known stock database: " + file.getUniquePath() + " (" + md5 + ")")
+        self.job.markKnown(file)
+        return True
+
+    # The file already seen with the same content as this one, linked to it with
+    # a TSK_DUPLICATE_DB artifact. None when the file is the first copy (or cannot
+    # be hashed) and must be extracted
+    def _findDuplicate(self, file):
+        try:
+            md5 = self._getContentHash(file)
+        except Exception as e:
+            self.log(Level.WARNING, "Could not hash file " + file.getName() + " (" + str(e) + ")")
+            return None
+
+        canonical = self.job.claimContent(md5, file)
+        if canonical is None:
+            return None
+
+        self.log(Level.INFO, "Skipping duplicate file: " + file.getUniquePath() + " (same content as " + canonical.getUniquePath() + ")")
+
+        # Make an artifact on the blackboard linking the copy to the file whose artifacts hold its data
+        dupId = self.job.types.getOrAddArtifactType("TSK_DUPLICATE_DB", "Duplicate database")
+        art = file.newArtifact(dupId.getTypeID())
+        attributes = ArrayList()
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_PATH_ID.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, long(canonical.getId())))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_PATH.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, canonical.getUniquePath()))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_HASH_MD5.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, md5))
+
+        art.addAttributes(attributes)
+        self.indexArtifact(art)
+        return canonical
+
+    # Returns the MD5 of the file content, reusing the hash computed by
+    # Autopsy's hash lookup module or by the copy when it is already available.
+    # Otherwise the content is streamed through the digest without being copied,
+    # so known stock databases and duplicates never cost a copy.
+    def _getContentHash(self, file):
+        md5 = file.getMd5Hash()
+        if md5:
+            return md5.lower()
+        if file.getId() in self.job.copyHashes:
+            return self.job.copyHashes[file.getId()][0]
+        md5 = self.job.contentMd5s.get(file.getId())
+        if md5 is None:
+            md5 = self._hashContent(file)
+            self.job.contentMd5s[file.getId()] = md5
+        return md5
+
+    # MD5 of the content of a file, read through the copy buffer
+    def _hashContent(self, file):
+        if self._copyBuffer is None:
+            self._copyBuffer = jarray.zeros(self.copyBufferSize, "b")
+        buf = self._copyBuffer
+        md5 = MessageDigest.getInstance("MD5")
+        stream = ReadContentInputStream(file)
+        try:
+            readLen = stream.read(buf)
+            while readLen > 0:
+                md5.update(buf, 0, readLen)
+                readLen = stream.read(buf)
+        finally:
+            stream.close()
+        return "".join(["%02x" % (b & 0xff) for b in md5.digest()])
+
+    # Save the DB locally in the temp folder only once per job, every extractor
+    # reading the same file reuses that copy. Use file id as name to reduce collisions.
+    # Returns None when the copy did not finish before the deadline
+    def _getLocalDb(self, file, deadline=None):
+        lclDbPath = self._localDbs.get(file.getId())
+        if lclDbPath is None:
+            lclDbPath = os.path.join(Case.getCurrentCase().getTempDirectory(), str(file.getId()) + ".db")
+            hashes = self._copyContent(file, lclDbPath, deadline)
+            if hashes is None:
+                os.remove(lclDbPath)
+                return None
+            self.job.copyHashes[file.getId()] = hashes
+            self._localDbs[file.getId()] = lclDbPath
+        return lclDbPath
+
+    # Copy the content of a file in a single pass, computing its MD5 and SHA-256
+    # from the same buffer that is written out. Returns both as hex strings,
+    # None when the deadline (epoch seconds, None for none) passed first
+    def _copyContent(self, file, path, deadline=None):
+        if self._copyBuffer is None:
+            self._copyBuffer = jarray.zeros(self.copyBufferSize, "b")
+        buf = self._copyBuffer
+        md5 = MessageDigest.getInstance("MD5")
+        sha256 = MessageDigest.getInstance("SHA-256")
+        stream = ReadContentInputStream(file)
+        try:
+            out = FileOutputStream(path)
+            try:
+                readLen = stream.read(buf)
+                while readLen > 0:
+                    if deadline is not None and time.time() >= deadline:
+                        return None
+                    md5.update(buf, 0, readLen)
+                    sha256.update(buf, 0, readLen)
+                    out.write(buf, 0, readLen)
+                    readLen = stream.read(buf)
+            finally:
+                out.close()
+        finally:
+            stream.close()
+        toHex = lambda digest: "".join(["%02x" % (b & 0xff) for b in digest.digest()])
+        return (toHex(md5), toHex(sha256))
+
+    # Record the hashes of the copy actually parsed on a TSK_EXTRACTED_DB
+    # artifact of the source file, checked against the hashes Autopsy stored
+    def _postCopyHashes(self, file, lclDbPath, md5, sha256):
+        checks = []
+        for hashName, computed, stored in (("MD5", md5, file.getMd5Hash()), ("SHA-256", sha256, file.getSha256Hash())):
+            if not stored:
+                continue
+            if stored.lower() == computed:
+                checks.append(hashName + " matches the hash stored by Autopsy")
+            else:
+                checks.append(hashName + " differs from the hash stored by Autopsy (" + stored.lower() + ")")
+                self.log(Level.SEVERE, "Copy of " + file.getUniquePath() + " has %s %s, Autopsy stored %s" % (hashName, computed, stored.lower()))
+        if not checks:
+            checks.append("No hash stored by Autopsy")
+
+        # Make an artifact on the blackboard, TSK_EXTRACTED_DB and give it the hashes of the copy
+        extractedId = self.job.types.getOrAddArtifactType("TSK_EXTRACTED_DB", "Extracted database")
+        sha256_att_type = self.job.types.getOrAddAttributeType('BMW_SHA256_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "SHA-256")
+        art = file.newArtifact(extractedId.getTypeID())
+        attributes = ArrayList()
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_HASH_MD5.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, md5))
+        attributes.add(BlackboardAttribute(sha256_att_type, IviBmwDbIngestModuleFactory.moduleName, sha256))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_PATH.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, lclDbPath))
+        attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_COMMENT.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, "; ".join(checks)))
+
+        art.addAttributes(attributes)
+        self.indexArtifact(art)
+
+    # Save the DB locally in the temp folder, reusing the copy made by an earlier
+    # extractor, and open it using JDBC. Returns None when it is not SQLite or
+    # could not be copied before the deadline
+    def _openDb(self, file, deadline=None):
+        lclDbPath = self._getLocalDb(file, deadline)
+        if lclDbPath is None:
+            return None
+        # Hashes of a copy that is parsed, recorded on its first opening
+        if file.getId() not in self.job.recordedCopies:
+            self.job.recordedCopies.add(file.getId())
+            md5, sha256 = self.job.copyHashes[file.getId()]
+            self._postCopyHashes(file, lclDbPath, md5, sha256)
+        try: 
+            Class.forName("org.sqlite.JDBC").newInstance()
+            return DriverManager.getConnection("jdbc:sqlite:%s"  % lclDbPath)
+        except SQLException as e:
+            self.log(Level.INFO, "Could not open database file (not SQLite) " + file.getName() + " (" + e.getMessage() + ")")
+            return None
+
+    # Row count and time range of the main table of an extractor within the
+    # time window, a single aggregate over one table so the preview can size
+    # every source quickly. dbConn may be the StatementGuard of the run.
+    # Returns (row count, first time, last time), None when unknown
+    def _previewStats(self, extractor, dbConn):
+        if extractor.table is None:
+            return (None, None, None)
+        columns = "COUNT(*) AS row_count"
+        if extractor.timeExpression is not None:
+            columns += ", MIN(%s) AS first_time, MAX(%s) AS last_time" % (extractor.timeExpression, extractor.timeExpression)
+        query = "SELECT %s FROM %s" % (columns, extractor.table)
+        predicate = extractor.windowPredicate(*self.job.timeWindow)
+        if predicate is not None:
+            query += " WHERE " + predicate
+        stmt = None
+        try:
+            stmt = dbConn.createStatement()
+            resultSet = stmt.executeQuery(query)
+            resultSet.next()
+            rowCount = resultSet.getLong("row_count")
+            if extractor.timeExpression is None:
+                return (rowCount, None, None)
+            return (rowCount, resultSet.getLong("first_time"), resultSet.getLong("last_time"))
+        except SQLException as e:
+            self.log(Level.INFO, "Error counting rows of " + extractor.table + " table (" + e.getMessage() + ")")
+            return (None, None, None)
+        finally:
+            if stmt is not None:
+                stmt.close()
+
+    # Post an inbox message with the volume of every source seen by the preview,
+    # so the examiner can pick the extractors worth a full run
+    def _postPreviewSummary(self, previewVolumes):
+        formatTime = lambda timestamp: time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(timestamp)) if timestamp else ""
+        details = ["<table border='1'><tr><th>Extractor</th><th>Database</th><th>Rows</th><th>First (UTC)</th><th>Last (UTC)</th></tr>"]
+        totalRows = 0
+        for name, fileName, rowCount, firstTime, lastTime in previewVolumes:
+            if rowCount is not None:
+                totalRows += rowCount
+            details.append("<tr><td>%s</td><td>%s</td><td>%s</td><td>%s</td><td>%s</td></tr>" % (name, fileName, "" if rowCount is None else rowCount, formatTime(firstTime), formatTime(lastTime)))
+        details.append("</table>")
+        message = IngestMessage.createMessage(IngestMessage.MessageType.INFO,
+            IviBmwDbIngestModuleFactory.moduleName, "Triage preview: %d rows in %d sources" % (totalRows, len(previewVolumes)), "".join(details))
+        IngestServices.getInstance().postMessage(message)
+
+    # Run one extractor over an open database, with the row cap and time window
+    # of the job settings; the preview sizes the source and only takes its first
+    # rows. Missing indexes the query needs are added to the copy first. Those
+    # steps and the query are interrupted at the deadline (epoch seconds, None
+    # for no time budget)
+    def _extractDb(self, extractor, file, dbConn, deadline):
+        if deadline is not None and time.time() >= deadline:
+            self._reportOverrun(extractor, file, None)
+            return
+        rowLimit = self.local_settings.getRowLimit(extractor.name)
+        guard = StatementGuard(dbConn, deadline)
+        try:
+            if self.local_settings.getPreviewMode():
+                self.job.previewVolumes.append((extractor.name, file.getName()) + self._previewStats(extractor, guard))
+                if rowLimit == 0 or rowLimit > self.local_settings.getPreviewRows():
+                    rowLimit = self.local_settings.getPreviewRows()
+            try:
+                for index in QueryPlanIndexer.apply(extractor, extractor.windowQuery(*self.job.timeWindow), guard):
+                    self.log(Level.INFO, "Created index %s on the copy of %s" % (index, file.getName()))
             except SQLException as e:
-                self.log(Level.INFO, "Error querying database for contacts table (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
+                self.log(Level.INFO, "Could not index the copy of " + file.getName() + " for " + extractor.name + " (" + e.getMessage() + ")")
+        finally:
+            guard.close()
+        if guard.interrupted:
+            self._reportOverrun(extractor, file, None)
+            return
+        self._runExtractor(extractor, file, dbConn, rowLimit, deadline)
 
-            # Cycle through each row and create artifacts
-            while resultSet.next():
-                try: 
-                    album = resultSet.getString("album")
-                    
-                    
-                except SQLException as e:
-                    self.log(Level.INFO, "Error getting values from contacts table (" + e.getMessage() + ")")                
-                
-                # Make an artifact on the blackboard, TSK_DOWNLOAD_SOURCE and give it attributes for each of the fields
-                art = file.newArtifact(artIIIIId.getTypeID())
-                library_albums_att_type = blackboard.getOrAddAttributeType('BMW_LIBRARY_ALBUMS_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "album")
-                attributes = ArrayList()
-                
-                attributes.add(BlackboardAttribute(library_albums_att_type,IviBmwDbIngestModuleFactory.moduleName, album)) 
+    # Run one extractor over one database. A RowReader streams the rows out of
+    # SQLite on its own thread while this thread posts the artifacts. Past the
+    # deadline the query is interrupted and the rows already posted are kept.
+    def _runExtractor(self, extractor, file, dbConn, rowLimit, deadline):
 
-                art.addAttributes(attributes)
+        # Timeline events of this file, already ordered by the query
+        run = None
+        if extractor.timelineSource is not None:
+            run = self.timeline.openRun(extractor.timelineSource, file)
+
+        # Time window and row cap applied by SQLite
+        query = extractor.windowQuery(*self.job.timeWindow)
+        if rowLimit > 0:
+            query = "SELECT * FROM (%s) LIMIT %d" % (query, rowLimit)
+
+        # Errors creating, indexing or exporting the artifacts of single rows
+        self._writeErrors = RowErrors()
+
+        # Prior rows of the extractor for a differential ingest
+        diff = None
+        if self.diff is not None and extractor.exportColumns:
+            diff = self.diff
+            diff.prepare(extractor)
+
+        reader = RowReader(dbConn, extractor, query, self.local_settings.getBatchSize(), self.rowQueueSize)
+        reader.start()
+        timer = None
+        if deadline is not None:
+            timer = threading.Timer(max(0.0, deadline - time.time()), reader.interrupt)
+            timer.daemon = True
+            timer.start()
+        rowCount = 0
+        try:
+            # Cycle through each row and create artifacts
+            for row in reader.rows(self.context.isJobCancelled):
+                if self.context.isJobCancelled() or reader.interrupted:
+                    break
+                rowCount += 1
                 try:
-                    # index the artifact for keyword search
-                    blackboard.indexArtifact(art)
-                except Blackboard.BlackboardException as e:
-                    self.log(Level.SEVERE, "Error indexing artifact " + art.getDisplayName())
+                    # Values of the row shared by the diff, the watchlist and the export
+                    values = extractor.exportRow(row)
+                    change = None
+                    if diff is not None:
+                        change = diff.classify(extractor, VehicleExport.sourcePath(file), values)
+                        if change is None:
+                            # Posted from the prior image already, but still part of
+                            # the vehicle: correlation, timeline and export keep it
+                            extractor.indexRow(self, file, row)
+                            if run is not None:
+                                timestamp, description = extractor.timelineEvent(row)
+                                run.add(timestamp, description, None)
+                            if self.export is not None:
+                                self.export.insert(extractor, file, None, values)
+                            continue
+                    art = extractor.postArtifact(self, file, row)
+                    if art is None:
+                        continue
+                    if change is not None:
+                        art.addAttribute(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_COMMENT.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, change))
+                    if self.local_settings.getPreviewMode():
+                        art.addAttribute(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_COMMENT.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, "Triage preview"))
+                    if run is not None:
+                        timestamp, description = extractor.timelineEvent(row)
+                        run.add(timestamp, description, art)
+                    if self.watchlist is not None:
+                        self._postWatchlistHits(file, art, self.watchlist.match(extractor.watchValues(row)))
+                    if self.export is not None:
+                        self.export.insert(extractor, file, art, values)
+                except (TskCoreException, SQLException) as e:
+                    self._writeErrors.add(e.getMessage())
+            if not self.context.isJobCancelled():
+                extractor.finish(self, file)
+        finally:
+            if timer is not None:
+                timer.cancel()
+            reader.cancel()
+            reader.join()
+
+        # Unread rows would look removed from the prior image
+        windowed = extractor.windowPredicate(*self.job.timeWindow) is not None
+        if diff is not None and (rowLimit > 0 or windowed or reader.interrupted or self.context.isJobCancelled()):
+            diff.markPartial(extractor)
 
-        #Library artists        
-        artIIIIIId = blackboard.getOrAddArtifactType("TSK_LIBRARY_ARTISTS", "Library artists")
+        if reader.interrupted:
+            self._reportOverrun(extractor, file, rowCount)
+        elif reader.error is not None:
+            self.log(Level.INFO, "Error querying database for " + extractor.name + " table (" + reader.error + ")")
+        if reader.rowErrors.count > 0:
+            self.log(Level.INFO, "Error getting values from %s table in %s: %s" % (extractor.name, file.getName(), reader.rowErrors))
+        if self._writeErrors.count > 0:
+            self.log(Level.SEVERE, "Error posting %s artifacts of %s: %s" % (extractor.name, file.getName(), self._writeErrors))
+        self._writeErrors = None
 
-        numFiles = len(files)
-        progressBar.switchToDeterminate(numFiles)
-        fileCount = 0
-        for file in files:
+    # Post an interesting item pointing to the artifact of a row for each
+    # watchlist entry found in its values
+    def _postWatchlistHits(self, file, art, hits):
+        for kind, listName, entry in sorted(set(hits)):
+            # Make an artifact on the blackboard, TSK_INTERESTING_ARTIFACT_HIT pointing to the matching artifact
+            hit = file.newArtifact(BlackboardArtifact.ARTIFACT_TYPE.TSK_INTERESTING_ARTIFACT_HIT)
+            attributes = ArrayList()
+            attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_SET_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, listName))
+            attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_ASSOCIATED_ARTIFACT.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, art.getArtifactID()))
+            attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_COMMENT.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, u"%s: %s" % (kind, entry)))
+            hit.addAttributes(attributes)
+            self.indexArtifact(hit)
+            self.watchlist.countHit()
+
+    # An extractor ran out of its time budget on a database, after posting
+    # rowCount rows (None when the budget was spent before the database)
+    def _reportOverrun(self, extractor, file, rowCount):
+        self.log(Level.WARNING, "Time budget of %s exceeded on %s, %s rows posted" % (extractor.name, file.getName(), "no" if rowCount is None else rowCount))
+        self.job.overruns.append((extractor.name, file.getName(), rowCount))
+
+    # Post the records of the prior image that are gone, on the data source, and
+    # summarise the differential ingest
+    def _postRemovedRecords(self):
+        removedType = self.job.types.getOrAddArtifactType("TSK_NBT_REMOVED_RECORD", "Removed record")
+        removedCount = 0
+        extractors = [extractor for extractor in self.extractors if self.mediaDetail or not extractor.detail]
+        for extractor, source, values in self.diff.removedRows(extractors):
+            # Make an artifact on the blackboard, TSK_NBT_REMOVED_RECORD with the values exported from the prior image
+            art = self.job.dataSource.newArtifact(removedType.getTypeID())
+            attributes = ArrayList()
+            attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_NAME.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, extractor.name))
+            attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_DESCRIPTION.getTypeID(), IviBmwDbIngestModuleFactory.moduleName,
+                u"; ".join([u"%s=%s" % (name, u"" if value is None else unicode(value)) for (name, columnType), value in zip(extractor.exportColumns, values)])))
+            attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_PATH.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, source))
+            attributes.add(BlackboardAttribute(BlackboardAttribute.ATTRIBUTE_TYPE.TSK_COMMENT.getTypeID(), IviBmwDbIngestModuleFactory.moduleName, SnapshotDiff.REMOVED))
+            art.addAttributes(attributes)
+            self.indexArtifact(art)
+            removedCount += 1
+
+        details = ["<p>Prior export: %s</p><table border='1'><tr><th>Extractor</th><th>Added</th><th>Changed</th><th>Unchanged</th></tr>" % self.diff.priorPath]
+        for name, (added, changed, unchanged) in sorted(self.diff.counts.items()):
+            details.append("<tr><td>%s</td><td>%d</td><td>%d</td><td>%d</td></tr>" % (name, added, changed, unchanged))
+        details.append("</table>")
+        message = IngestMessage.createMessage(IngestMessage.MessageType.INFO,
+            IviBmwDbIngestModuleFactory.moduleName, "Differential ingest: %d added, %d changed, %d removed records"
+            % (sum([counts[0] for counts in self.diff.counts.values()]), sum([counts[1] for counts in self.diff.counts.values()]), removedCount), "".join(details))
+        IngestServices.getInstance().postMessage(message)
+        self.diff.close()
+
+    # Correlate, merge the timeline, commit the export and post the summaries
+    # once every database of the job was extracted
+    def _finishJob(self):
+        #link calls and messages to the contacts owning their phone numbers
+        matchCount = self.phoneIndex.correlate(self)
+        self.log(Level.INFO, "Correlated %d calls and messages with contacts" % matchCount)
+
+        #records of the prior image that are gone
+        if self.diff is not None:
+            self._postRemovedRecords()
+
+        #media store and folder paths linked to the directories of the image
+        resolvedCount, pathCount = self.pathIndex.counts()
+        if self.pathIndex.error is not None:
+            self.log(Level.WARNING, "Could not index the directories of the data source (" + self.pathIndex.error + ")")
+        elif pathCount > 0:
+            self.log(Level.INFO, "Linked %d of %d media store and folder paths to directories of the data source" % (resolvedCount, pathCount))
+
+        #Bluetooth vendor lookups
+        if self.ouiRegistry.error is not None:
+            self.log(Level.WARNING, "Could not load the OUI registry, no Bluetooth vendors looked up (" + self.ouiRegistry.error + ")")
+
+        #vehicle timeline
+        eventCount = self.timeline.merge()
+        self.log(Level.INFO, "Wrote %d events to timeline %s" % (eventCount, self.timeline.path))
+
+        #vehicle export
+        if self.export is not None:
+            self.export.close()
+            self.log(Level.INFO, "Wrote %d rows to %s" % (self.export.rowCount, self.export.path))
+
+        #Post a message to the ingest messages in box.
+        message = IngestMessage.createMessage(IngestMessage.MessageType.DATA,
+            "Sample Jython Data Source Ingest Module", "Found %d files (%d duplicate copies and %d known stock databases skipped)"
+            % (len(self._localDbs), self.job.duplicateCount, self.job.knownCount))
+        IngestServices.getInstance().postMessage(message)
+
+        #known stock databases learnt from a reference vehicle
+        if self.local_settings.getLearnKnownDbs():
+            addedCount = self.job.knownDbs.add(self.job.contentHashes())
+            self.log(Level.INFO, "Added %d hashes to %s" % (addedCount, self.job.knownDbs.path))
+        self.job.knownDbs.close()
+
+        if self.local_settings.getPreviewMode():
+            self._postPreviewSummary(self.job.previewVolumes)
+
+        if self.watchlist is not None and self.watchlist.hitCount > 0:
+            message = IngestMessage.createMessage(IngestMessage.MessageType.DATA,
+                IviBmwDbIngestModuleFactory.moduleName, "%d watchlist hits (%d entries of %s)"
+                % (self.watchlist.hitCount, self.watchlist.entryCount, self.watchlist.path))
+            IngestServices.getInstance().postMessage(message)
+
+        if self.job.overruns:
+            details = ["<table border='1'><tr><th>Extractor</th><th>Database</th><th>Rows posted</th></tr>"]
+            for name, fileName, rowCount in self.job.overruns:
+                details.append("<tr><td>%s</td><td>%s</td><td>%s</td></tr>" % (name, fileName, "not started" if rowCount is None else rowCount))
+            details.append("</table>")
+            message = IngestMessage.createMessage(IngestMessage.MessageType.WARNING,
+                IviBmwDbIngestModuleFactory.moduleName, "%d extractions stopped by their time budget" % len(self.job.overruns), "".join(details))
+            IngestServices.getInstance().postMessage(message)
+
+    # Failures inside an extractor run are counted with the other per-row errors
+    def _artifactError(self, msg):
+        if self._writeErrors is not None:
+            self._writeErrors.add(msg)
+        else:
+            self.log(Level.SEVERE, msg)
+
+    def indexArtifact(self, art):
+        try:
+            # index the artifact for keyword search
+            self.blackboard.indexArtifact(art)
+        except Blackboard.BlackboardException as e:
+            self._artifactError("Error indexing artifact " + art.getDisplayName())
+
+    def postArtifact(self, art):
+        try:
+            Case.getCurrentCase().getSleuthkitCase().getBlackboard().postArtifact(art, IviBmwDbIngestModuleFactory.moduleName)
+        except Blackboard.BlackboardException as e:
+            self._artifactError("Error posting artifact " + art.getDisplayName())
+
+
+# Data Source-level ingest module.  One gets created per data source.
+# TODO: Rename this to something more specific. Could just remove "Factory" from above name.
+class IviBmwDbIngestModule(NbtIngestModuleBase, DataSourceIngestModule):
+
+    def __init__(self, settings):
+        self.context = None
+        self.local_settings = settings
+        # Extractors turned off in the job settings never look for their databases
+        self.extractors = [extractor for extractor in createExtractors() if settings.isExtractorEnabled(extractor.name)]
+        # Post one artifact per media library row instead of the per-mediastore summaries
+        self.mediaDetail = settings.getMediaDetail()
+        self.job = None
+        self.export = None
+        self._writeErrors = None
+
+    # NBT units keep byte-identical copies of the same database on several QNX
+    # partitions or as backups. Keep only the first file of each distinct content
+    # and link the other copies to it with a TSK_DUPLICATE_DB artifact. Known
+    # stock databases are dropped as well, and so are directories and empty files,
+    # which all share the MD5 of no content.
+    def _dedupeFiles(self, files):
+        return [file for file in files if file.isFile() and file.getSize() > 0 and
+                not self._isKnownDb(file) and self._findDuplicate(file) is None]
+
+    # (pages in use, total size) of the databases of an extractor, a cheap
+    # estimate of its run time read from the images before anything is copied
+    def _estimateCost(self, extractor, files):
+        return (sum([self._estimatePages(file) for file in files]), sum([file.getSize() for file in files]))
+
+    # Pages holding data in a database, from its SQLite header: the page count
+    # (or the file size over the page size when the header count is stale)
+    # less the free list. 0 when the file is not SQLite
+    def _estimatePages(self, file):
+        buf = jarray.zeros(100, "b")
+        try:
+            if file.read(buf, 0, len(buf)) < len(buf):
+                return 0
+        except TskCoreException:
+            return 0
+        header = "".join([chr(b & 0xff) for b in buf])
+        if header[:16] != SqliteDiscovery.header:
+            return 0
+        pageSize, = struct.unpack(">H", header[16:18])
+        if pageSize == 1:
+            pageSize = 65536
+        if pageSize < 512:
+            return 0
+        changeCounter, pageCount = struct.unpack(">ii", header[24:32])
+        freePages, = struct.unpack(">i", header[36:40])
+        validFor, = struct.unpack(">i", header[92:96])
+        if pageCount <= 0 or changeCounter != validFor:
+            pageCount = file.getSize() // pageSize
+        return max(0, pageCount - freePages)
+
+    # Where any setup and configuration is done
+    # 'context' is an instance of org.sleuthkit.autopsy.ingest.IngestJobContext.
+    # See: http://sleuthkit.org/autopsy/docs/api-docs/4.4/classorg_1_1sleuthkit_1_1autopsy_1_1ingest_1_1_ingest_job_context.html
+    # TODO: Add any setup code that you need here.
+    def startUp(self, context):
+        
+        # Throw an IngestModule.IngestModuleException exception if there was a problem setting up
+        self.context = context
+        if not self.local_settings.getFileIngestMode():
+            self._checkInputs()
+
+    # Commit whatever a cancelled job already exported
+    def shutDown(self):
+        if self.export is not None:
+            self.export.close()
+
+    # Where the analysis is done.
+    # The 'dataSource' object being passed in is of type org.sleuthkit.datamodel.Content.
+    # See: http://www.sleuthkit.org/sleuthkit/docs/jni-docs/4.4/interfaceorg_1_1sleuthkit_1_1datamodel_1_1_content.html
+    # 'progressBar' is of type org.sleuthkit.autopsy.ingest.DataSourceIngestModuleProgress
+    # See: http://sleuthkit.org/autopsy/docs/api-docs/4.4/classorg_1_1sleuthkit_1_1autopsy_1_1ingest_1_1_data_source_ingest_module_progress.html
+    def process(self, dataSource, progressBar):
+
+        # The file ingest variant extracts the databases as the file pipeline reaches them
+        if self.local_settings.getFileIngestMode():
+            return IngestModule.ProcessResult.OK
+
+        # we don't know how much work there is yet
+        progressBar.switchToIndeterminate()
+
+        self._attachJob(NbtJobState(dataSource, self.local_settings))
+
+        fileManager = Case.getCurrentCase().getServices().getFileManager()
+        # file name pattern -> deduplicated files, several extractors read the same databases
+        filesByPattern = {}
+        # (priority, estimated cost, position, extractor, files) of the extractors with databases
+        work = []
+        for position, extractor in enumerate(self.extractors):
 
             # Check if the user pressed cancel while we were busy
             if self.context.isJobCancelled():
                 return IngestModule.ProcessResult.OK
 
-            self.log(Level.INFO, "Processing file: " + file.getName())
-            fileCount += 1
-
-            # Save the DB locally in the temp folder. use file id as name to reduce collisions
-            lclDbPath = os.path.join(Case.getCurrentCase().getTempDirectory(), str(file.getId()) + ".db" )
-            ContentUtils.writeToFile(file, File(lclDbPath))
-                        
-            # Open the DB using JDBC
-            try: 
-                Class.forName("org.sqlite.JDBC").newInstance()
-                dbConn = DriverManager.getConnection("jdbc:sqlite:%s"  % lclDbPath)
-            except SQLException as e:
-                self.log(Level.INFO, "Could not open database file (not SQLite) " + file.getName() + " (" + e.getMessage() + ")")
-                return IngestModule.ProcessResult.OK
-            
-            # Query the Library artists  table in the database and get all columns. 
-            try:
-                stmt = dbConn.createStatement()
-                resultSet = stmt.executeQuery("SELECT library_artists.artist FROM library_artists")
-            except SQLException as e:
-                self.log(Level.INFO, "Error querying database for contacts table (" + e.getMessage() + ")")
+            # The media library tables are summarised unless the full detail is asked for
+            if extractor.detail and not self.mediaDetail:
+                continue
+
+            # Find the databases, regardless of parent path
+            files = filesByPattern.get(extractor.filePattern)
+            if files is None:
+                files = self._dedupeFiles(fileManager.findFiles(dataSource, extractor.filePattern))
+                filesByPattern[extractor.filePattern] = files
+            if files:
+                priority = self.local_settings.getPriority(extractor.name, extractor.priority)
+                work.append((priority, self._estimateCost(extractor, files), position, extractor, files))
+
+        # Critical and cheap sources first, the examiner sees call logs and devices
+        # before the bulk media and web tables are done
+        work.sort(key=lambda unit: unit[:3])
+
+        progressBar.switchToDeterminate(len(work))
+        for unitCount, (priority, cost, position, extractor, files) in enumerate(work):
+
+            # Check if the user pressed cancel while we were busy
+            if self.context.isJobCancelled():
                 return IngestModule.ProcessResult.OK
 
-            # Cycle through each row and create artifacts
-            while resultSet.next():
-                try: 
-                    artist = resultSet.getString("artist")
-                    
-                    
-                except SQLException as e:
-                    self.log(Level.INFO, "Error getting values from contacts table (" + e.getMessage() + ")")                
-                
-                # Make an artifact on the blackboard, TSK_DOWNLOAD_SOURCE and give it attributes for each of the fields
-                art = file.newArtifact(artIIIIIId.getTypeID())
-                library_artists_att_type = blackboard.getOrAddAttributeType('BMW_LIBRARY_ARTISTS_TYPE',BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.STRING, "artist")
-                attributes = ArrayList()
-                
-                attributes.add(BlackboardAttribute(library_artists_att_type,IviBmwDbIngestModuleFactory.moduleName, artist)) 
+            progressBar.progress(extractor.name, unitCount)
 
-                art.addAttributes(attributes)
+            # The time budget covers every database of the extractor
+            deadline = None
+            if self.local_settings.getTimeBudget() > 0:
+                deadline = time.time() + self.local_settings.getTimeBudget()
+
+            extractor.startUp(self.job.types)
+            for file in files:
+
+                # Check if the user pressed cancel while we were busy
+                if self.context.isJobCancelled():
+                    return IngestModule.ProcessResult.OK
+
+                if deadline is not None and time.time() >= deadline:
+                    self._reportOverrun(extractor, file, None)
+                    continue
+
+                self.log(Level.INFO, "Processing file: " + file.getName())
+                dbConn = self._openDb(file, deadline)
+                if dbConn is None:
+                    if deadline is not None and time.time() >= deadline:
+                        self._reportOverrun(extractor, file, None)
+                    continue
                 try:
-                    # index the artifact for keyword search
-                    blackboard.indexArtifact(art)
-                except Blackboard.BlackboardException as e:
-                    self.log(Level.SEVERE, "Error indexing artifact " + art.getDisplayName())
+                    self._extractDb(extractor, file, dbConn, deadline)
+                finally:
+                    dbConn.close()
 
-        #Post a message to the ingest messages in box.
-        message = IngestMessage.createMessage(IngestMessage.MessageType.DATA,
-            "Sample Jython Data Source Ingest Module", "Found %d files" % fileCount)
-        IngestServices.getInstance().postMessage(message)
+        progressBar.progress(len(work))
+
+        #discovery of the other SQLite databases
+        if self.local_settings.getDiscoveryMode():
+            progressBar.switchToIndeterminate()
+            if not self._runDiscovery(dataSource, self.job.moduleDir):
+                return IngestModule.ProcessResult.OK
+
+        self._finishJob()
         
         return IngestModule.ProcessResult.OK
+
+    # Fingerprint every SQLite file of the data source, write the report next to
+    # the timeline and post a summary of the known and unknown schemas.
+    # Returns False if the job was cancelled
+    def _runDiscovery(self, dataSource, moduleDir):
+        knownTables = [extractor.table for extractor in createExtractors() if extractor.table is not None]
+        discovery = SqliteDiscovery(knownTables, Case.getCurrentCase().getTempDirectory())
+        results = discovery.run(dataSource, self.context)
+        if results is None:
+            return False
+
+        reportPath = os.path.join(moduleDir, "discovery_%d.tsv" % dataSource.getId())
+        discovery.writeReport(reportPath, results)
+
+        # fingerprint -> (known, tables, number of files)
+        schemas = {}
+        for result in results:
+            if result.fingerprint is None:
+                continue
+            known, tables, fileCount = schemas.get(result.fingerprint, (discovery.isKnown(result), sorted(result.tables), 0))
+            schemas[result.fingerprint] = (known, tables, fileCount + 1)
+        unknown = [(fingerprint, tables, fileCount) for fingerprint, (known, tables, fileCount) in schemas.items() if not known]
+
+        details = ["<p>Report: %s</p><table border='1'><tr><th>Unknown schema</th><th>Files</th><th>Tables</th></tr>" % reportPath]
+        for fingerprint, tables, fileCount in unknown:
+            details.append("<tr><td>%s</td><td>%d</td><td>%s</td></tr>" % (fingerprint, fileCount, ", ".join(tables)))
+        details.append("</table>")
+        message = IngestMessage.createMessage(IngestMessage.MessageType.INFO,
+            IviBmwDbIngestModuleFactory.moduleName, "Discovery: %d SQLite databases, %d known and %d unknown schemas"
+            % (len(results), len(schemas) - len(unknown), len(unknown)), "".join(details))
+        IngestServices.getInstance().postMessage(message)
+        return True
+
+
+# File-level variant of the ingest module, one per file ingest thread. The
+# databases are matched by name as the file pipeline reaches them and extracted
+# on Autopsy's file ingest threads, next to hashing and the other file modules,
+# instead of in a serial phase after them. The modules of a job share one
+# NbtJobState, whose last user correlates and writes the outputs.
+class IviBmwDbFileIngestModule(NbtIngestModuleBase, FileIngestModule):
+
+    def __init__(self, settings):
+        self.context = None
+        self.local_settings = settings
+        self.mediaDetail = settings.getMediaDetail()
+        # Each thread has its own extractors, they keep state between the rows of a file
+        self.extractors = [extractor for extractor in createExtractors()
+                           if settings.isExtractorEnabled(extractor.name) and (self.mediaDetail or not extractor.detail)]
+        self.job = None
+        self.export = None
+        self._writeErrors = None
+
+    # Case-insensitive regular expression of a SQL LIKE pattern of findFiles
+    @staticmethod
+    def _likeToRegex(pattern):
+        parts = []
+        for c in pattern:
+            if c == "%":
+                parts.append(".*")
+            elif c == "_":
+                parts.append(".")
+            else:
+                parts.append(re.escape(c))
+        return re.compile("^" + "".join(parts) + "$", re.IGNORECASE)
+
+    def startUp(self, context):
+        self.context = context
+        if not self.local_settings.getFileIngestMode():
+            return
+        self._checkInputs()
+        self._attachJob(NbtJobState.acquire(context, self.local_settings))
+        for extractor in self.extractors:
+            extractor.startUp(self.job.types)
+        # (compiled file pattern, extractor) in priority order, the extractors of a
+        # database run from the most to the least critical
+        positions = dict([(extractor, position) for position, extractor in enumerate(self.extractors)])
+        ordered = sorted(self.extractors, key=lambda extractor: (self.local_settings.getPriority(extractor.name, extractor.priority), positions[extractor]))
+        patterns = {}
+        self._patterns = []
+        for extractor in ordered:
+            if extractor.filePattern not in patterns:
+                patterns[extractor.filePattern] = IviBmwDbFileIngestModule._likeToRegex(extractor.filePattern)
+            self._patterns.append((patterns[extractor.filePattern], extractor))
+
+    def process(self, file):
+        if self.job is None:
+            return IngestModule.ProcessResult.OK
+
+        # Skip the unallocated space, directories and empty files
+        if (file.getType() == TskData.TSK_DB_FILES_TYPE_ENUM.UNALLOC_BLOCKS or
+            file.getType() == TskData.TSK_DB_FILES_TYPE_ENUM.UNUSED_BLOCKS or
+            not file.isFile() or file.getSize() == 0):
+            return IngestModule.ProcessResult.OK
+
+        extractors = [extractor for pattern, extractor in self._patterns if pattern.match(file.getName())]
+        if not extractors or self._isKnownDb(file) or self._findDuplicate(file) is not None:
+            return IngestModule.ProcessResult.OK
+
+        self.log(Level.INFO, "Processing file: " + file.getName())
+        # The copy is bounded by the time budget of a single extractor
+        deadline = None
+        if self.local_settings.getTimeBudget() > 0:
+            deadline = time.time() + self.local_settings.getTimeBudget()
+        dbConn = self._openDb(file, deadline)
+        if dbConn is None:
+            if deadline is not None and time.time() >= deadline:
+                for extractor in extractors:
+                    self._reportOverrun(extractor, file, None)
+            return IngestModule.ProcessResult.OK
+        try:
+            for extractor in extractors:
+                if self.context.fileIngestIsCancelled():
+                    break
+                # The time budget covers the extractor on this database
+                deadline = None
+                if self.local_settings.getTimeBudget() > 0:
+                    deadline = time.time() + self.local_settings.getTimeBudget()
+                self._extractDb(extractor, file, dbConn, deadline)
+        finally:
+            dbConn.close()
+        return IngestModule.ProcessResult.OK
+
+    # The last module of the job finishes the outputs, a cancelled job only
+    # commits what it already exported
+    def shutDown(self):
+        if self.job is None or not NbtJobState.release(self.context, self.job):
+            return
+        if self.context.fileIngestIsCancelled():
+            if self.export is not None:
+                self.export.close()
+            return
+        self._finishJob()
+
+
+# Report of the artifacts posted by this module, one set of pages per vehicle
+# (data source). The case database is read page by page with keyset queries on
+# the artifact id and every row is written out as soon as it is read, HTML and
+# CSV side by side, so memory stays constant however many cookies or media
+# rows the vehicle holds. index.html is the overview of every vehicle.
+class IviBmwReportModule(GeneralReportModuleAdapter):
+
+    moduleName = "Infotainment BMW NBT report"
+
+    # Artifacts fetched per query
+    pageSize = 1000
+
+    # Artifact types of the report, in the order of the sections
+    artifactTypes = ("TSK_DEVICE_INFO", "TSK_BLUETOOTH_PAIRING", "TSK_BLUETOOTH_ADDRESS", "TSK_CALLLOG",
+                     "TSK_MESSAGE", "TSK_CONTACT", "TSK_CONTACT_PHONE", "TSK_CONTACT_EMAIL",
+                     "TSK_CONTACT_ADDRESS", "TSK_GPS_TRACK", "TSK_GPS_SEARCH", "TSK_USB_DEVICEDETAILS",
+                     "TSK_FOLDERS", "TSK_SOFTWARE_INFO", "TSK_MEDIASTORE_SUMMARY", "TSK_MEDIA_LIBRARY_SUMMARY",
+                     "TSK_MUSIC_GROUPS", "TSK_LIBRARY_ALBUNS", "TSK_LIBRARY_ARTISTS", "TSK_WEB_HISTORY",
+                     "TSK_WEB_COOKIE", "TSK_EXTRACTED_DB", "TSK_DUPLICATE_DB")
+
+    def getName(self):
+        return self.moduleName
+
+    def getDescription(self):
+        return "Overview and HTML/CSV tables of the BMW NBT artifacts of every vehicle"
+
+    def getRelativeFilePath(self):
+        return "index.html"
+
+    # 'reportSettings' is an org.sleuthkit.autopsy.report.GeneralReportSettings,
+    # 'progressBar' an org.sleuthkit.autopsy.report.ReportProgressPanel
+    def generateReport(self, reportSettings, progressBar):
+        progressBar.setIndeterminate(False)
+        progressBar.start()
+
+        self.caseDb = Case.getCurrentCase().getSleuthkitCase()
+        reportDir = reportSettings.getReportDirectoryPath()
+        # (type id, type name, display name) of the report types present in the case
+        types = self._artifactTypes()
+        dataSources = self.caseDb.getDataSources()
+        progressBar.setMaximumProgress(len(dataSources) * len(types) + 1)
+
+        overviewPath = os.path.join(reportDir, self.getRelativeFilePath())
+        overview = codecs.open(overviewPath, "w", "utf-8")
+        try:
+            overview.write(u"<html><head><meta charset='utf-8'><title>BMW NBT report</title></head><body><h1>BMW NBT report</h1>\n")
+            for dataSource in dataSources:
+                overview.write(self._vehicleOverview(reportDir, dataSource, types))
+                self._writeVehicle(reportDir, dataSource, types, progressBar)
+            overview.write(u"</body></html>\n")
+        finally:
+            overview.close()
+
+        Case.getCurrentCase().addReport(overviewPath, self.moduleName, "BMW NBT report")
+        progressBar.increment()
+        progressBar.complete(ReportStatus.COMPLETE)
+
+    # Rows of a case database query, the result set is closed when the loop ends
+    def _query(self, sql):
+        query = self.caseDb.executeQuery(sql)
+        try:
+            resultSet = query.getResultSet()
+            while resultSet.next():
+                yield resultSet
+        finally:
+            query.close()
+
+    def _artifactTypes(self):
+        names = ", ".join(["'%s'" % name for name in self.artifactTypes])
+        found = {}
+        for resultSet in self._query("SELECT artifact_type_id, type_name, display_name FROM blackboard_artifact_types WHERE type_name IN (%s)" % names):
+            found[resultSet.getString("type_name")] = (resultSet.getInt("artifact_type_id"), resultSet.getString("type_name"), resultSet.getString("display_name"))
+        return [found[name] for name in self.artifactTypes if name in found]
+
+    # SQL condition of the artifacts of a type and vehicle that hold attributes of the module
+    def _artifactFilter(self, typeId, dataSource):
+        return ("arts.artifact_type_id = %d AND arts.data_source_obj_id = %d AND EXISTS "
+                "(SELECT 1 FROM blackboard_attributes AS own WHERE own.artifact_id = arts.artifact_id AND own.source = '%s')"
+                % (typeId, dataSource.getId(), IviBmwDbIngestModuleFactory.moduleName))
+
+    # Section of index.html: artifact counts and time span of one vehicle
+    def _vehicleOverview(self, reportDir, dataSource, types):
+        html = [u"<h2>%s</h2>" % self._escape(dataSource.getName())]
+        for resultSet in self._query("SELECT MIN(attrs.value_int64) AS first_time, MAX(attrs.value_int64) AS last_time "
+                                     "FROM blackboard_attributes AS attrs JOIN blackboard_artifacts AS arts ON arts.artifact_id = attrs.artifact_id "
+                                     "WHERE arts.data_source_obj_id = %d AND attrs.source = '%s' AND attrs.value_type = %d AND attrs.value_int64 > 0"
+                                     % (dataSource.getId(), IviBmwDbIngestModuleFactory.moduleName, BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.DATETIME.getType())):
+            if resultSet.getLong("first_time") > 0:
+                html.append(u"<p>Records from %s to %s (UTC)</p>" % (self._formatTime(resultSet.getLong("first_time")), self._formatTime(resultSet.getLong("last_time"))))
+        html.append(u"<table border='1'><tr><th>Artifact</th><th>Count</th><th>CSV</th></tr>")
+        for typeId, typeName, displayName in types:
+            count = 0
+            for resultSet in self._query("SELECT COUNT(*) AS artifact_count FROM blackboard_artifacts AS arts WHERE " + self._artifactFilter(typeId, dataSource)):
+                count = resultSet.getLong("artifact_count")
+            if count == 0:
+                continue
+            html.append(u"<tr><td><a href='%s#%s'>%s</a></td><td>%d</td><td><a href='%s'>%s</a></td></tr>"
+                        % (self._vehiclePage(dataSource), typeName, self._escape(displayName), count, self._csvName(dataSource, typeName), self._csvName(dataSource, typeName)))
+        html.append(u"</table>\n")
+        return u"".join(html)
+
+    def _vehiclePage(self, dataSource):
+        return "vehicle_%d.html" % dataSource.getId()
+
+    def _csvName(self, dataSource, typeName):
+        return "vehicle_%d_%s.csv" % (dataSource.getId(), typeName.lower())
+
+    # One HTML page per vehicle with a section per artifact type, each section
+    # also written to its own CSV file
+    def _writeVehicle(self, reportDir, dataSource, types, progressBar):
+        page = codecs.open(os.path.join(reportDir, self._vehiclePage(dataSource)), "w", "utf-8")
+        try:
+            page.write(u"<html><head><meta charset='utf-8'><title>%s</title></head><body><h1>%s</h1>\n" % (self._escape(dataSource.getName()), self._escape(dataSource.getName())))
+            for typeId, typeName, displayName in types:
+                self._writeSection(reportDir, page, dataSource, typeId, typeName, displayName)
+                progressBar.increment()
+            page.write(u"</body></html>\n")
+        finally:
+            page.close()
+
+    def _writeSection(self, reportDir, page, dataSource, typeId, typeName, displayName):
+        artifactFilter = self._artifactFilter(typeId, dataSource)
+
+        # (attribute type id, display name) of the columns, known before the first row
+        columns = []
+        for resultSet in self._query("SELECT DISTINCT attrs.attribute_type_id, types.display_name FROM blackboard_attributes AS attrs "
+                                     "JOIN blackboard_artifacts AS arts ON arts.artifact_id = attrs.artifact_id "
+                                     "JOIN blackboard_attribute_types AS types ON types.attribute_type_id = attrs.attribute_type_id "
+                                     "WHERE %s ORDER BY attrs.attribute_type_id" % artifactFilter):
+            columns.append((resultSet.getInt("attribute_type_id"), resultSet.getString("display_name")))
+        if not columns:
+            return
+
+        header = ["Artifact ID", "Source file ID"] + [name for attributeTypeId, name in columns]
+        csvFile = codecs.open(os.path.join(reportDir, self._csvName(dataSource, typeName)), "w", "utf-8")
+        try:
+            csvFile.write(self._csvLine(header))
+            page.write(u"<h2 id='%s'>%s</h2><table border='1'><tr>%s</tr>\n" % (typeName, self._escape(displayName), "".join([u"<th>%s</th>" % self._escape(name) for name in header])))
+
+            lastId = 0
+            while True:
+                pageIds = [(resultSet.getLong("artifact_id"), resultSet.getLong("obj_id")) for resultSet in
+                           self._query("SELECT arts.artifact_id, arts.obj_id FROM blackboard_artifacts AS arts WHERE %s AND arts.artifact_id > %d ORDER BY arts.artifact_id LIMIT %d"
+                                       % (artifactFilter, lastId, self.pageSize))]
+                if not pageIds:
+                    break
+                lastId = pageIds[-1][0]
+                # artifact id -> {attribute type id: [values]} of this page only
+                values = {}
+                for resultSet in self._query("SELECT attrs.artifact_id, attrs.attribute_type_id, attrs.value_type, attrs.value_text, attrs.value_int32, attrs.value_int64, attrs.value_double "
+                                             "FROM blackboard_attributes AS attrs WHERE attrs.artifact_id IN (%s)" % ", ".join([str(artifactId) for artifactId, objId in pageIds])):
+                    values.setdefault(resultSet.getLong("artifact_id"), {}).setdefault(resultSet.getInt("attribute_type_id"), []).append(self._formatValue(resultSet))
+                for artifactId, objId in pageIds:
+                    attributes = values.get(artifactId, {})
+                    row = [unicode(artifactId), unicode(objId)] + [u"; ".join(attributes.get(attributeTypeId, [])) for attributeTypeId, name in columns]
+                    csvFile.write(self._csvLine(row))
+                    page.write(u"<tr>%s</tr>\n" % "".join([u"<td>%s</td>" % self._escape(value) for value in row]))
+            page.write(u"</table>\n")
+        finally:
+            csvFile.close()
+
+    def _formatValue(self, resultSet):
+        valueType = resultSet.getInt("value_type")
+        if valueType == BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.INTEGER.getType():
+            return unicode(resultSet.getInt("value_int32"))
+        if valueType == BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.LONG.getType():
+            return unicode(resultSet.getLong("value_int64"))
+        if valueType == BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.DATETIME.getType():
+            return self._formatTime(resultSet.getLong("value_int64"))
+        if valueType == BlackboardAttribute.TSK_BLACKBOARD_ATTRIBUTE_VALUE_TYPE.DOUBLE.getType():
+            return unicode(resultSet.getDouble("value_double"))
+        return resultSet.getString("value_text") or u""
+
+    @staticmethod
+    def _formatTime(timestamp):
+        if not timestamp:
+            return u""
+        return unicode(time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(timestamp)))
+
+    @staticmethod
+    def _escape(value):
+        return value.replace(u"&", u"&amp;").replace(u"<", u"&lt;").replace(u">", u"&gt;").replace(u"'", u"&#39;")
+
+    @staticmethod
+    def _csvLine(values):
+        return u",".join([u'"%s"' % value.replace(u'"', u'""') for value in values]) + u"\r\n"